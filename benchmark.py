@@ -0,0 +1,797 @@
+#!/usr/bin/env python3
+"""
+Script para medir el rendimiento de las herramientas Python del repositorio.
+Genera datos sintéticos (logotipos, fotos con fondo simple y PDF con texto y
+tablas), mide cada función con distintos tamaños y números de procesos, y
+compara los resultados con una medición anterior guardada en JSON.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+
+# Directorio donde viven los scripts a medir
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Scripts cuyo arranque se mide (sin dependencias externas para este script)
+STARTUP_SCRIPTS = ['favicon.py', 'pdf_a_word.py', 'remove_background.py']
+
+# Resoluciones (lado en píxeles) de los logotipos sintéticos para create_favicon
+FAVICON_RESOLUTIONS = [512, 1024, 2048, 4096]
+
+# Logotipos del lote de create_favicons_batch
+FAVICON_BATCH_SIZE = 8
+
+# Resoluciones (lado mayor en píxeles) de las fotos sintéticas para remove_background
+PHOTO_RESOLUTIONS = [512, 1024, 2048]
+
+# Fotos del lote de remove_background_batch
+PHOTO_BATCH_SIZE = 8
+
+# Imágenes por pasada del modelo a comparar en la inferencia por lotes
+INFERENCE_BATCH_SIZES = [1, 4, 8]
+
+# Número de páginas de los PDF sintéticos para convertir_pdf_a_word
+PDF_PAGES = [10, 50]
+
+# Diferencia (en %) a partir de la cual un caso se considera más lento que la referencia
+REGRESSION_THRESHOLD = 10.0
+
+# Texto de relleno para los PDF sintéticos
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat."
+)
+
+
+def time_command(command, repeat=5, cwd=None):
+    """
+    Ejecuta un comando varias veces y mide su tiempo de reloj.
+    
+    Args:
+        command (list): Comando y argumentos
+        repeat (int): Número de repeticiones
+        cwd (str): Directorio de trabajo (opcional)
+    
+    Returns:
+        list: Tiempos en segundos de cada ejecución
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            command,
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"'{' '.join(str(c) for c in command)}' terminó con código {result.returncode}: "
+                f"{result.stderr.decode(errors='replace').strip()}"
+            )
+        times.append(elapsed)
+    return times
+
+
+def print_times(label, times):
+    """Muestra el resumen de una serie de tiempos."""
+    print(f"  {label:<40} mín {min(times) * 1000:8.1f} ms   "
+          f"mediana {statistics.median(times) * 1000:8.1f} ms   "
+          f"máx {max(times) * 1000:8.1f} ms")
+
+
+def make_result(times, units=None, unit=None, peak_rss_mb=None):
+    """
+    Resume una serie de tiempos en el formato que se guarda en JSON.
+    
+    Args:
+        times (list): Tiempos en segundos
+        units (float): Trabajo hecho en cada repetición (imágenes, páginas...)
+        unit (str): Nombre del trabajo para el rendimiento (por ejemplo 'páginas')
+        peak_rss_mb (float): Pico de memoria residente en MB (opcional)
+    
+    Returns:
+        dict: 'times', 'median', 'throughput', 'unit' y 'peak_rss_mb'
+    """
+    median = statistics.median(times)
+    return {
+        'times': times,
+        'median': median,
+        'throughput': units / median if units and median else None,
+        'unit': unit,
+        'peak_rss_mb': peak_rss_mb
+    }
+
+
+def print_result(label, result):
+    """Muestra tiempos, rendimiento y memoria de un caso."""
+    print_times(label, result['times'])
+    details = []
+    if result['throughput'] is not None:
+        details.append(f"{result['throughput']:.1f} {result['unit']}/s")
+    if result['peak_rss_mb'] is not None:
+        details.append(f"pico {result['peak_rss_mb']:.0f} MB")
+    if details:
+        print(f"  {'':<40} {'   '.join(details)}")
+
+
+def benchmark_startup(repeat=5):
+    """
+    Mide el tiempo de arranque de cada script con --help.
+    
+    Como referencia también se mide un intérprete vacío: la diferencia entre
+    ambos es el coste propio de cada script antes de hacer trabajo útil.
+    
+    Args:
+        repeat (int): Repeticiones por script
+    
+    Returns:
+        dict: Resultado (ver make_result) por nombre de caso
+    """
+    results = {}
+    
+    print("\n⏱️  Arranque (--help)")
+    print("=" * 60)
+    
+    times = time_command([sys.executable, '-c', 'pass'], repeat=repeat)
+    print_times('python (intérprete vacío)', times)
+    results['arranque: python'] = make_result(times)
+    
+    for script in STARTUP_SCRIPTS:
+        times = time_command([sys.executable, str(SCRIPTS_DIR / script), '--help'], repeat=repeat)
+        print_times(script, times)
+        results[f"arranque: {script}"] = make_result(times)
+    
+    return results
+
+
+def time_call(function, repeat=5):
+    """
+    Llama a una función varias veces sin mostrar su salida y mide su tiempo.
+    
+    Args:
+        function (callable): Función sin argumentos a medir
+        repeat (int): Número de repeticiones
+    
+    Returns:
+        list: Tiempos en segundos de cada llamada
+    """
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_rss_mb():
+    """Pico de memoria residente de este proceso y sus hijos en MB (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # Linux informa en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _measure(case, kwargs, repeat):
+    """Prepara y mide un caso dentro de un proceso nuevo (ver run_case)."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    function = case(**kwargs)
+    times = time_call(function, repeat=repeat)
+    return times, peak_rss_mb()
+
+
+def run_case(case, kwargs, repeat=5):
+    """
+    Mide un caso en un proceso nuevo para que el pico de memoria sea solo suyo.
+    
+    Args:
+        case (callable): Función de nivel de módulo que prepara el caso (carga de
+                         modelos, etc., sin medir) y devuelve la función a medir
+        kwargs (dict): Argumentos de case
+        repeat (int): Número de repeticiones
+    
+    Returns:
+        tuple: Tiempos en segundos y pico de memoria residente en MB
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_measure, case, kwargs, repeat).result()
+
+
+def make_logo(path, side, image_format='PNG'):
+    """
+    Genera un logotipo sintético (degradado con formas y transparencia).
+    
+    Args:
+        path (Path): Ruta del archivo a crear
+        side (int): Lado de la imagen en píxeles
+        image_format (str): Formato de la imagen ('PNG' o 'JPEG')
+    """
+    from PIL import Image, ImageDraw
+    
+    gradient = Image.linear_gradient('L').resize((side, side))
+    img = Image.merge('RGB', (gradient, gradient.rotate(90), Image.new('L', (side, side), 160)))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((side // 8, side // 8, side * 7 // 8, side * 7 // 8), fill=(240, 90, 30))
+    draw.rectangle((side // 3, side // 3, side * 2 // 3, side * 2 // 3), fill=(20, 40, 120))
+    
+    if image_format == 'PNG':
+        alpha = Image.new('L', (side, side), 0)
+        ImageDraw.Draw(alpha).rounded_rectangle((0, 0, side - 1, side - 1), radius=side // 6, fill=255)
+        img.putalpha(alpha)
+    
+    img.save(path, format=image_format)
+
+
+def make_photo(path, side, seed=0):
+    """
+    Genera una foto sintética: un sujeto con textura sobre un fondo simple.
+    
+    El fondo es un degradado suave y el sujeto una silueta (cabeza y torso)
+    con ruido, de modo que los modelos de segmentación tengan un primer plano
+    claro que separar. La foto es apaisada 4:3 con el lado mayor indicado.
+    
+    Args:
+        path (Path): Ruta del archivo JPEG a crear
+        side (int): Lado mayor de la imagen en píxeles
+        seed (int): Semilla del ruido (fotos distintas para los lotes)
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFilter
+    
+    width, height = side, side * 3 // 4
+    background = Image.linear_gradient('L').rotate(90).resize((width, height))
+    img = Image.merge('RGB', (
+        background.point(lambda v: 150 + v // 4),
+        background.point(lambda v: 170 + v // 5),
+        Image.new('L', (width, height), 200)
+    ))
+    
+    mask = Image.new('L', (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+    cx = width // 2 + (seed % 5 - 2) * width // 20
+    draw.ellipse((cx - height // 8, height // 6, cx + height // 8, height * 5 // 12), fill=255)
+    draw.rounded_rectangle((cx - height // 4, height * 5 // 12, cx + height // 4, height),
+                           radius=height // 10, fill=255)
+    mask = mask.filter(ImageFilter.GaussianBlur(max(1, side // 512)))
+    
+    rng = np.random.default_rng(seed)
+    texture = rng.normal(0, 18, (height, width, 3)) + np.array([120, 70, 50])
+    subject = Image.fromarray(np.clip(texture, 0, 255).astype(np.uint8))
+    img.paste(subject, (0, 0), mask)
+    
+    img.save(path, format='JPEG', quality=90)
+
+
+def _favicon_case(logo, output_dir):
+    from favicon import create_favicon
+    # force=True: el manifiesto incremental haría que las repeticiones no generaran nada
+    return lambda: create_favicon(logo, output_dir=output_dir, force=True)
+
+
+def _favicon_batch_case(jobs, workers):
+    from favicon import create_favicons_batch
+    return lambda: create_favicons_batch(jobs, workers=workers, force=True)
+
+
+def benchmark_favicon(repeat=5, resolutions=None, workers_list=None):
+    """
+    Mide create_favicon() con logotipos sintéticos de distintas resoluciones
+    y create_favicons_batch() con distintos números de procesos.
+    
+    Args:
+        repeat (int): Repeticiones por resolución
+        resolutions (list): Lados de los logotipos (por defecto: FAVICON_RESOLUTIONS)
+        workers_list (list): Números de procesos a comparar (por defecto: 1 y núcleos)
+    
+    Returns:
+        dict: Resultado (ver make_result) por nombre de caso
+    """
+    if workers_list is None:
+        workers_list = sorted({1, os.cpu_count() or 1})
+    
+    results = {}
+    
+    print("\n⏱️  create_favicon()")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for side in resolutions or FAVICON_RESOLUTIONS:
+            for image_format, suffix in [('PNG', 'png'), ('JPEG', 'jpg')]:
+                logo = tmp / f"logo_{side}.{suffix}"
+                make_logo(logo, side, image_format)
+                output_dir = tmp / f"salida_{side}_{suffix}"
+                
+                times, rss = run_case(_favicon_case, {'logo': logo, 'output_dir': output_dir}, repeat)
+                label = f"favicon: {side}x{side} {image_format}"
+                results[label] = make_result(times, 1, 'logotipos', rss)
+                print_result(label, results[label])
+        
+        jobs = []
+        for index in range(FAVICON_BATCH_SIZE):
+            logo = tmp / f"lote_{index}.png"
+            make_logo(logo, 1024)
+            jobs.append({'input': logo, 'output_dir': tmp / f"lote_{index}", 'sizes': None})
+        
+        for workers in workers_list:
+            times, rss = run_case(_favicon_batch_case, {'jobs': jobs, 'workers': workers}, repeat)
+            label = f"favicon: lote {len(jobs)}x1024, {workers} proceso(s)"
+            results[label] = make_result(times, len(jobs), 'logotipos', rss)
+            print_result(label, results[label])
+    
+    return results
+
+
+def _remove_background_case(photo, output_path, model, runtime=None):
+    from remove_background import create_session, remove_background
+    # La carga del modelo (y la cuantización) no forma parte de la medición
+    session = create_session(model, **(runtime or {}))
+    return lambda: remove_background(photo, output_path, model=model, session=session)
+
+
+def _remove_background_batched_case(photos, model, batch_size):
+    from remove_background import create_session, remove_background_bytes_batch
+    session = create_session(model)
+    input_data_list = [Path(photo).read_bytes() for photo in photos]
+    return lambda: remove_background_bytes_batch(input_data_list, model=model, session=session,
+                                                 batch_size=batch_size)
+
+
+def _mask_iou(photo, model, quantized_dir=None):
+    """IoU entre las máscaras del modelo fp32 y de su variante int8 (umbral 128)."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import numpy as np
+    from remove_background import create_session, remove_background_image
+    
+    data = Path(photo).read_bytes()
+    masks = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for quantized in (False, True):
+            session = create_session(model, quantized=quantized, quantized_dir=quantized_dir)
+            mask = remove_background_image(data, model=model, session=session, only_mask=True)
+            masks.append(np.asarray(mask) >= 128)
+    
+    union = np.logical_or(*masks).sum()
+    return float(np.logical_and(*masks).sum() / union) if union else 1.0
+
+
+def _remove_background_batch_case(photos, output_dir, model, workers):
+    from remove_background import remove_background_batch
+    return lambda: remove_background_batch(photos, output_dir, model=model, workers=workers)
+
+
+def benchmark_remove_background(repeat=3, resolutions=None, workers_list=None, model='birefnet-general',
+                                quantize=False, quantized_dir=None, batch_sizes=None):
+    """
+    Mide remove_background() con fotos sintéticas de distintas resoluciones
+    y remove_background_batch() con distintos números de procesos.
+    
+    En las fotos sueltas el modelo se carga antes de medir; en los lotes la
+    carga forma parte del tiempo, igual que al usar el script.
+    
+    Con quantize también se mide cada foto con la variante int8 del modelo y
+    se compara su máscara con la del modelo fp32 (IoU: 1.0 = idénticas).
+    
+    La inferencia por lotes (remove_background_bytes_batch) se mide con el
+    lote de fotos en memoria y cada tamaño de batch_sizes, y se compara con
+    el de una imagen por pasada.
+    
+    Args:
+        repeat (int): Repeticiones por caso
+        resolutions (list): Lados mayores de las fotos (por defecto: PHOTO_RESOLUTIONS)
+        workers_list (list): Números de procesos a comparar (por defecto: 1 y núcleos)
+        model (str): Modelo de rembg
+        quantize (bool): Comparar también con la variante int8
+        quantized_dir (str): Directorio de las variantes int8 (opcional)
+        batch_sizes (list): Imágenes por pasada del modelo (por defecto: INFERENCE_BATCH_SIZES)
+    
+    Returns:
+        dict: Resultado (ver make_result) por nombre de caso
+    """
+    if workers_list is None:
+        workers_list = sorted({1, os.cpu_count() or 1})
+    
+    results = {}
+    
+    print(f"\n⏱️  remove_background() (modelo {model})")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for side in resolutions or PHOTO_RESOLUTIONS:
+            photo = tmp / f"foto_{side}.jpg"
+            make_photo(photo, side)
+            
+            times, rss = run_case(
+                _remove_background_case,
+                {'photo': photo, 'output_path': tmp / f"foto_{side}_no_bg.png", 'model': model},
+                repeat
+            )
+            label = f"remove_background: {side}px"
+            results[label] = make_result(times, 1, 'imágenes', rss)
+            print_result(label, results[label])
+            
+            if quantize:
+                times, rss = run_case(
+                    _remove_background_case,
+                    {'photo': photo, 'output_path': tmp / f"foto_{side}_int8.png", 'model': model,
+                     'runtime': {'quantized': True, 'quantized_dir': quantized_dir}},
+                    repeat
+                )
+                label = f"remove_background: {side}px, int8"
+                results[label] = make_result(times, 1, 'imágenes', rss)
+                print_result(label, results[label])
+                
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    iou = executor.submit(_mask_iou, photo, model, quantized_dir).result()
+                results[label]['mask_iou'] = iou
+                print(f"  {'':<40} IoU de la máscara frente a fp32: {iou:.4f}")
+        
+        photos = []
+        for index in range(PHOTO_BATCH_SIZE):
+            photo = tmp / f"lote_{index}.jpg"
+            make_photo(photo, 1024, seed=index)
+            photos.append(str(photo))
+        
+        for workers in workers_list:
+            times, rss = run_case(
+                _remove_background_batch_case,
+                {'photos': photos, 'output_dir': tmp / f"lote_{workers}", 'model': model,
+                 'workers': workers},
+                repeat
+            )
+            label = f"remove_background: lote {len(photos)}x1024px, {workers} proceso(s)"
+            results[label] = make_result(times, len(photos), 'imágenes', rss)
+            print_result(label, results[label])
+        
+        # Los modelos exportados con lote fijo ignoran batch_size (ver predict_masks)
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        with contextlib.redirect_stdout(io.StringIO()):
+            from remove_background import create_session, effective_batch_size
+            session = create_session(model)
+        
+        single = None
+        for batch_size in batch_sizes or INFERENCE_BATCH_SIZES:
+            times, rss = run_case(
+                _remove_background_batched_case,
+                {'photos': photos, 'model': model, 'batch_size': batch_size},
+                repeat
+            )
+            label = f"remove_background: lote {len(photos)}x1024px, {batch_size} por pasada"
+            effective = effective_batch_size(session, model, batch_size)
+            if effective != batch_size:
+                label += f" (lote fijo del modelo: {effective})"
+            results[label] = make_result(times, len(photos), 'imágenes', rss)
+            print_result(label, results[label])
+            if batch_size == 1:
+                single = results[label]['median']
+            elif single is not None:
+                print(f"  {'':<40} x{single / results[label]['median']:.2f} frente a 1 por pasada")
+    
+    return results
+
+
+def make_pdf(path, pages):
+    """
+    Genera un PDF sintético con títulos, párrafos y una tabla por página.
+    
+    Args:
+        path (Path): Ruta del archivo a crear
+        pages (int): Número de páginas
+    """
+    import fitz
+    
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Sección {number}", fontsize=18)
+        page.insert_textbox(fitz.Rect(72, 90, 523, 300), " ".join([LOREM] * 3), fontsize=11)
+        
+        # Tabla de 5x4 con bordes (pdf2docx la detecta como tabla reticulada)
+        top, row_height, col_width = 320, 24, 112
+        for row in range(6):
+            y = top + row * row_height
+            page.draw_line((72, y), (72 + 4 * col_width, y))
+        for col in range(5):
+            x = 72 + col * col_width
+            page.draw_line((x, top), (x, top + 5 * row_height))
+        for row in range(5):
+            for col in range(4):
+                page.insert_text(
+                    (76 + col * col_width, top + row * row_height + 16),
+                    f"Dato {number}.{row}.{col}",
+                    fontsize=10
+                )
+        
+        page.insert_textbox(fitz.Rect(72, 460, 523, 760), " ".join([LOREM] * 4), fontsize=11)
+    
+    doc.save(str(path))
+    doc.close()
+
+
+def _pdf_case(pdf, docx, **options):
+    from pdf_a_word import convertir_pdf_a_word
+    return lambda: convertir_pdf_a_word(pdf, docx, **options)
+
+
+def benchmark_pdf(repeat=1, pages_list=None, workers_list=None):
+    """
+    Mide convertir_pdf_a_word() en serie, en paralelo y en modo texto con PDF sintéticos.
+    
+    Args:
+        repeat (int): Repeticiones por caso
+        pages_list (list): Páginas de cada PDF (por defecto: PDF_PAGES)
+        workers_list (list): Números de procesos a comparar (por defecto: 1 y núcleos)
+    
+    Returns:
+        dict: Resultado (ver make_result) por nombre de caso
+    """
+    if workers_list is None:
+        workers_list = sorted({1, os.cpu_count() or 1})
+    
+    results = {}
+    
+    print("\n⏱️  convertir_pdf_a_word()")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for pages in pages_list or PDF_PAGES:
+            pdf = tmp / f"documento_{pages}.pdf"
+            make_pdf(pdf, pages)
+            
+            for workers in workers_list:
+                docx = tmp / f"documento_{pages}_{workers}.docx"
+                times, rss = run_case(_pdf_case, {'pdf': pdf, 'docx': docx, 'procesos': workers}, repeat)
+                label = f"pdf: {pages} páginas, {workers} proceso(s)"
+                results[label] = make_result(times, pages, 'páginas', rss)
+                print_result(label, results[label])
+            
+            # Exportación solo de texto frente al diseño completo en un proceso
+            # (se mide también si -w no incluía 1)
+            serial_label = f"pdf: {pages} páginas, 1 proceso(s)"
+            if serial_label not in results:
+                docx = tmp / f"documento_{pages}_1.docx"
+                times, rss = run_case(_pdf_case, {'pdf': pdf, 'docx': docx, 'procesos': 1}, repeat)
+                results[serial_label] = make_result(times, pages, 'páginas', rss)
+                print_result(serial_label, results[serial_label])
+            
+            docx = tmp / f"documento_{pages}_texto.docx"
+            times, rss = run_case(_pdf_case, {'pdf': pdf, 'docx': docx, 'modo': 'text'}, repeat)
+            label = f"pdf: {pages} páginas, modo texto"
+            results[label] = make_result(times, pages, 'páginas', rss)
+            print_result(label, results[label])
+            layout = results[serial_label]
+            print(f"  {'':<40} {layout['median'] / results[label]['median']:.0f}x más rápido "
+                  f"que el diseño completo")
+    
+    return results
+
+
+def save_results(path, results):
+    """Guarda los resultados y los datos de la máquina en un archivo JSON."""
+    data = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    Path(path).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+def compare_with_baseline(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara la mediana y el pico de memoria de cada caso con una medición guardada.
+    
+    Args:
+        results (dict): Resultados actuales por nombre de caso
+        baseline_path (str): Archivo JSON creado con --save
+        threshold (float): Porcentaje de tiempo extra a partir del cual hay regresión
+    
+    Returns:
+        list: Nombres de los casos más lentos que la referencia
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    reference = baseline['results']
+    regressions = []
+    
+    print(f"\n📊 Comparación con {baseline_path} ({baseline.get('date', 'sin fecha')})")
+    print("=" * 60)
+    
+    for label, result in results.items():
+        if label not in reference:
+            print(f"     {label:<40} (sin referencia)")
+            continue
+        
+        before = reference[label]['median']
+        change = (result['median'] - before) / before * 100 if before else 0.0
+        if change > threshold:
+            marker = '🔴'
+            regressions.append(label)
+        elif change < -threshold:
+            marker = '🟢'
+        else:
+            marker = '⚪'
+        
+        memory = ""
+        if result['peak_rss_mb'] is not None and reference[label].get('peak_rss_mb') is not None:
+            memory = f"   memoria {result['peak_rss_mb'] - reference[label]['peak_rss_mb']:+.0f} MB"
+        print(f"  {marker} {label:<40} {before * 1000:8.1f} ms -> {result['median'] * 1000:8.1f} ms "
+              f"({change:+.1f}%){memory}")
+    
+    if regressions:
+        print(f"\n🔴 {len(regressions)} caso(s) más de un {threshold:.0f}% más lentos que la referencia")
+    else:
+        print(f"\n✅ Ningún caso es más de un {threshold:.0f}% más lento que la referencia")
+    
+    return regressions
+
+
+def main():
+    """Función principal para ejecutar desde línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description='Mide el rendimiento de las herramientas Python del repositorio',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Pruebas disponibles:
+  startup            - Tiempo de arranque de cada script (--help)
+  favicon            - create_favicon() con logotipos de 512 a 4096 píxeles y lotes
+  remove_background  - remove_background() con fotos de 512 a 2048 píxeles y lotes
+  pdf                - convertir_pdf_a_word() en serie, en paralelo y en modo texto (10 y 50 páginas)
+  all                - Todas las anteriores
+
+Cada caso se mide en un proceso nuevo y muestra su rendimiento y su pico de memoria.
+
+Ejemplos de uso:
+  %(prog)s startup
+  %(prog)s startup -r 20
+  %(prog)s favicon -w 1 2 4
+  %(prog)s pdf -r 3
+  %(prog)s remove_background -m u2net -r 2
+  %(prog)s remove_background -m u2net --quantize  # fp32 frente a int8 (latencia e IoU)
+  %(prog)s remove_background -m u2net -b 1 2 4 8  # imágenes por pasada del modelo
+  %(prog)s all --save referencia.json
+  %(prog)s all --baseline referencia.json  # compara y sale con error si hay regresiones
+        """
+    )
+    
+    parser.add_argument(
+        'benchmark',
+        help='Prueba a ejecutar',
+        choices=['startup', 'favicon', 'remove_background', 'pdf', 'all']
+    )
+    
+    parser.add_argument(
+        '-r', '--repeat',
+        help='Repeticiones por medición (por defecto: 5)',
+        type=int,
+        default=5
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        help='Números de procesos a comparar en los lotes y PDF (por defecto: 1 y núcleos)',
+        type=int,
+        nargs='+',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-m', '--model',
+        help='Modelo de rembg para remove_background (por defecto: birefnet-general)',
+        default='birefnet-general'
+    )
+    
+    parser.add_argument(
+        '-b', '--batch-sizes',
+        help='Imágenes por pasada del modelo a comparar en remove_background (por defecto: 1 4 8)',
+        type=int,
+        nargs='+',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--quantize',
+        action='store_true',
+        help='Comparar remove_background con la variante int8 del modelo (latencia e IoU de la máscara)'
+    )
+    
+    parser.add_argument(
+        '--quantized-dir',
+        help='Directorio de los modelos int8 (por defecto: el de remove_background.py)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--save',
+        metavar='ARCHIVO',
+        help='Guardar los resultados en un archivo JSON para usarlo como referencia',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--baseline',
+        metavar='ARCHIVO',
+        help='Comparar con los resultados guardados con --save',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--threshold',
+        help=f'Porcentaje de tiempo extra que cuenta como regresión (por defecto: {REGRESSION_THRESHOLD:.0f})',
+        type=float,
+        default=REGRESSION_THRESHOLD
+    )
+    
+    args = parser.parse_args()
+    
+    if args.repeat < 1:
+        parser.error("-r/--repeat debe ser al menos 1")
+    
+    if args.workers is not None and min(args.workers) < 1:
+        parser.error("-w/--workers debe ser al menos 1")
+    
+    if args.batch_sizes is not None and min(args.batch_sizes) < 1:
+        parser.error("-b/--batch-sizes debe ser al menos 1")
+    
+    if args.baseline is not None and not Path(args.baseline).exists():
+        parser.error(f"No existe el archivo de referencia {args.baseline}")
+    
+    selected = ['startup', 'favicon', 'remove_background', 'pdf'] if args.benchmark == 'all' else [args.benchmark]
+    
+    try:
+        results = {}
+        if 'startup' in selected:
+            results.update(benchmark_startup(repeat=args.repeat))
+        if 'favicon' in selected:
+            results.update(benchmark_favicon(repeat=args.repeat, workers_list=args.workers))
+        if 'remove_background' in selected:
+            results.update(benchmark_remove_background(
+                repeat=args.repeat,
+                workers_list=args.workers,
+                model=args.model,
+                quantize=args.quantize,
+                quantized_dir=args.quantized_dir,
+                batch_sizes=args.batch_sizes
+            ))
+        if 'pdf' in selected:
+            results.update(benchmark_pdf(repeat=args.repeat, workers_list=args.workers))
+        
+        if args.save is not None:
+            save_results(args.save, results)
+            print(f"\n💾 Resultados guardados en: {args.save}")
+        
+        if args.baseline is not None:
+            if compare_with_baseline(results, args.baseline, args.threshold):
+                sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,17 @@ Genera archivos .ico y .png en los tamaños estándar para favicons.
 """
 
 import argparse
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
 import subprocess
 import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 
@@ -20,11 +29,9 @@ def check_and_install_dependencies():
     
     missing_deps = []
     
-    # Verificar cada dependencia
+    # Verificar cada dependencia sin importarla (solo se busca el módulo)
     for module_name, package_name in dependencies.items():
-        try:
-            __import__(module_name)
-        except ImportError:
+        if importlib.util.find_spec(module_name) is None:
             missing_deps.append((module_name, package_name))
     
     # Si faltan dependencias, preguntar al usuario
@@ -60,28 +67,235 @@ def check_and_install_dependencies():
             sys.exit(1)
 
 
-# Verificar dependencias antes de importarlas
-check_and_install_dependencies()
+# Extensiones de imagen que se buscan al recibir un directorio de logotipos
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
+
+# Tamaños adicionales que siempre se generan (favicon.png y apple-touch-icon.png)
+STANDARD_SIZE = 32
+APPLE_TOUCH_SIZE = 180
+
+# Tamaño máximo que se sirve bajo demanda (FaviconRenderer); el origen se
+# decodifica una sola vez a la resolución necesaria para este tamaño
+SERVE_MAX_SIZE = 512
+
+# Esfuerzo de compresión PNG: opciones de Pillow de cada nivel (max es el de siempre)
+EFFORT_LEVELS = {
+    'fast': {'compress_level': 1},
+    'balanced': {'compress_level': 6},
+    'max': {'optimize': True}
+}
+
+# Tamaños por defecto (también los del ICO servido bajo demanda)
+DEFAULT_SIZES = [16, 32, 48, 64, 128, 256]
+
+# Manifiesto que se guarda en el directorio de salida para la regeneración incremental
+MANIFEST_NAME = '.favicon-manifest.json'
+MANIFEST_VERSION = 2
+
+
+def load_source(input_path, max_size):
+    """
+    Decodifica la imagen de origen una sola vez, a la menor resolución útil.
+    
+    En JPEG se usa el modo borrador del decodificador para obtener directamente
+    una versión reducida (1/2, 1/4 u 1/8) que siga cubriendo el tamaño más grande
+    pedido; en el resto de formatos se reduce con Image.reduce (promedio por
+    bloques, mucho más barato que LANCZOS) hasta unas 2 veces ese tamaño.
+    
+    Args:
+        input_path (Path): Ruta de la imagen de entrada
+        max_size (int): Mayor tamaño que se va a generar
+    
+    Returns:
+        PIL.Image: Imagen RGBA lista para los redimensionados finales
+    """
+    from PIL import Image
+    
+    try:
+        img = Image.open(input_path)
+        # Solo tiene efecto en JPEG; debe llamarse antes de cargar los píxeles
+        img.draft('RGB', (max_size * 2, max_size * 2))
+        img.load()
+    except Exception as e:
+        raise ValueError(f"Error al abrir la imagen: {e}")
+    
+    # Convertir a RGBA si no lo está (necesario para transparencia)
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    
+    # Reducción progresiva: dejar la imagen en ~2x el tamaño máximo antes de LANCZOS
+    factor_x = max(1, img.width // (max_size * 2))
+    factor_y = max(1, img.height // (max_size * 2))
+    if factor_x > 1 or factor_y > 1:
+        img = img.reduce((factor_x, factor_y))
+    
+    return img
+
+
+def render_sizes(img, sizes):
+    """
+    Redimensiona la imagen una sola vez por cada tamaño distinto.
+    
+    Args:
+        img (PIL.Image): Imagen de origen (ver load_source)
+        sizes (iterable): Tamaños a generar
+    
+    Returns:
+        dict: Imagen redimensionada por tamaño
+    """
+    from PIL import Image
+    
+    return {
+        size: img.resize((size, size), Image.Resampling.LANCZOS)
+        for size in sorted(set(sizes))
+    }
+
+
+def plan_outputs(sizes):
+    """
+    Enumera los archivos que genera create_favicon() para una lista de tamaños.
+    
+    El ICO solo se incluye si algún tamaño cabe en él (hasta 256 px).
+    
+    Args:
+        sizes (list): Tamaños pedidos
+    
+    Returns:
+        list: Tuplas (clave, nombre de archivo, tamaños que contiene)
+    """
+    outputs = [(f'png_{size}', f"favicon-{size}x{size}.png", [size]) for size in sizes]
+    # El formato ICO puede contener múltiples resoluciones (hasta 256x256)
+    ico_sizes = [size for size in sizes if size <= 256]
+    if ico_sizes:
+        outputs.append(('ico', 'favicon.ico', ico_sizes))
+    outputs.append(('standard', 'favicon.png', [STANDARD_SIZE]))
+    outputs.append(('apple', 'apple-touch-icon.png', [APPLE_TOUCH_SIZE]))
+    return outputs
+
+
+def encode_output(rendered, key, output_sizes, effort='max', quantize=None):
+    """
+    Codifica uno de los archivos de plan_outputs() a partir de los tamaños ya renderizados.
+    
+    Args:
+        rendered (dict): Imagen redimensionada por tamaño (ver render_sizes)
+        key (str): Clave del archivo ('ico' o cualquiera de los PNG)
+        output_sizes (list): Tamaños que contiene
+        effort (str): Esfuerzo de compresión de los PNG (ver EFFORT_LEVELS)
+        quantize (int): Reducir a una paleta de 256 colores (con transparencia)
+                        los PNG de hasta este tamaño (opcional; el ICO no se toca)
+    
+    Returns:
+        bytes: Contenido del archivo
+    """
+    from PIL import Image
+    
+    buffer = io.BytesIO()
+    if key == 'ico':
+        if not output_sizes:
+            raise ValueError("El ICO necesita al menos un tamaño de hasta 256 px")
+        # Las imágenes del ICO son las mismas ya redimensionadas; la primera debe
+        # ser la mayor porque Pillow descarta los tamaños que la superan
+        ico_images = [rendered[size] for size in sorted(output_sizes, reverse=True)]
+        ico_images[0].save(
+            buffer,
+            format='ICO',
+            sizes=[(size, size) for size in output_sizes],
+            append_images=ico_images[1:] if len(ico_images) > 1 else None
+        )
+    else:
+        img = rendered[output_sizes[0]]
+        if quantize and output_sizes[0] <= quantize:
+            img = img.quantize(256, method=Image.Quantize.FASTOCTREE)
+        img.save(buffer, format='PNG', **EFFORT_LEVELS[effort])
+    return buffer.getvalue()
+
+
+def output_entry(key, output_sizes, effort='max', quantize=None):
+    """Entrada del manifiesto de un archivo: sus tamaños y las opciones que cambian sus bytes."""
+    entry = {'sizes': output_sizes}
+    if key != 'ico':
+        entry['effort'] = effort
+        entry['quantized'] = bool(quantize and output_sizes[0] <= quantize)
+    return entry
+
+
+def read_output_manifest(output_dir):
+    """Lee el manifiesto de un directorio de salida (vacío si no existe o no es válido)."""
+    try:
+        manifest = json.loads((Path(output_dir) / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest
+
 
-# Ahora importar las dependencias
-from PIL import Image
+def write_output_manifest(output_dir, manifest):
+    """Guarda el manifiesto de forma atómica en el directorio de salida."""
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, path)
 
 
-def create_favicon(input_path, output_dir=None, sizes=None):
+def source_fingerprint(input_path, previous=None):
+    """
+    Identifica el contenido de la imagen de origen.
+    
+    Si la ruta, el tamaño y la fecha de modificación coinciden con los del
+    manifiesto anterior se reutiliza su hash sin volver a leer el archivo.
+    
+    Args:
+        input_path (Path): Ruta de la imagen de origen
+        previous (dict): Huella guardada en el manifiesto anterior (opcional)
+    
+    Returns:
+        dict: Huella con 'path', 'size', 'mtime_ns' y 'sha256'
+    """
+    stat = input_path.stat()
+    fingerprint = {
+        'path': str(input_path.resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+    
+    if previous and all(previous.get(key) == value for key, value in fingerprint.items()):
+        fingerprint['sha256'] = previous['sha256']
+    else:
+        fingerprint['sha256'] = hashlib.sha256(input_path.read_bytes()).hexdigest()
+    return fingerprint
+
+
+def create_favicon(input_path, output_dir=None, sizes=None, verbose=True, force=False, stats=None,
+                   effort='max', quantize=None, threads=None):
     """
     Convierte una imagen en favicon con múltiples tamaños.
     
+    Los archivos ya generados a partir de la misma imagen y con las mismas
+    opciones (según el manifiesto del directorio de salida) no se regeneran.
+    Los archivos son independientes entre sí, así que se codifican en un pool
+    de hilos (los codificadores de Pillow liberan el GIL).
+    
     Args:
         input_path (str): Ruta de la imagen de entrada
         output_dir (str): Directorio de salida (opcional, usa el directorio de entrada por defecto)
         sizes (list): Lista de tamaños a generar (opcional)
+        verbose (bool): Mostrar cada archivo generado con su tamaño y tiempo de codificación
+        force (bool): Regenerar todos los archivos aunque estén al día
+        stats (dict): Si se indica, se rellena con 'written', 'skipped' y 'files'
+                      (bytes y segundos de codificación de cada archivo generado)
+        effort (str): Esfuerzo de compresión de los PNG: 'fast', 'balanced' o 'max'
+        quantize (int): Reducir a paleta los PNG de hasta este tamaño (opcional)
+        threads (int): Hilos de codificación (por defecto: uno por archivo, hasta
+                       el número de núcleos)
     
     Returns:
         dict: Diccionario con las rutas de los archivos generados
     """
     # Tamaños estándar para favicons
     if sizes is None:
-        sizes = [16, 32, 48, 64, 128, 256]
+        sizes = DEFAULT_SIZES
     
     input_path = Path(input_path)
     
@@ -96,70 +310,420 @@ def create_favicon(input_path, output_dir=None, sizes=None):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Cargar imagen original
+    # Comparar con el manifiesto anterior para saber qué archivos están al día
+    manifest = read_output_manifest(output_dir)
+    fingerprint = source_fingerprint(input_path, manifest.get('source'))
+    previous_outputs = manifest.get('outputs', {}) if not force else {}
+    if manifest.get('source', {}).get('sha256') != fingerprint['sha256']:
+        previous_outputs = {}
+    
+    outputs = plan_outputs(sizes)
+    stale = []
+    generated_files = {}
+    for key, filename, output_sizes in outputs:
+        generated_files[key] = str(output_dir / filename)
+        entry = previous_outputs.get(filename)
+        if entry == output_entry(key, output_sizes, effort, quantize) and (output_dir / filename).exists():
+            continue
+        stale.append((key, filename, output_sizes))
+    
+    if stats is not None:
+        stats['written'] = len(stale)
+        stats['skipped'] = len(outputs) - len(stale)
+        stats['files'] = {}
+    
+    if not stale:
+        if verbose:
+            print(f"✓ Sin cambios: {len(outputs)} archivos ya están al día")
+        return generated_files
+    
+    # Cargar imagen original y generar cada tamaño distinto una sola vez;
+    # los PNG, el ICO, favicon.png y apple-touch-icon comparten los resultados
+    # La reducción previa depende del mayor tamaño de todo el plan, no solo de los
+    # archivos pendientes, para que un archivo regenerado salga igual que en una
+    # generación completa
+    needed_sizes = {size for _, _, output_sizes in stale for size in output_sizes}
+    img = load_source(input_path, max(size for _, _, output_sizes in outputs for size in output_sizes))
+    rendered = render_sizes(img, needed_sizes)
+    
+    def encode(output):
+        key, filename, output_sizes = output
+        start = time.perf_counter()
+        data = encode_output(rendered, key, output_sizes, effort, quantize)
+        seconds = time.perf_counter() - start
+        (output_dir / filename).write_bytes(data)
+        return len(data), seconds
+    
+    threads = max(1, min(threads or os.cpu_count() or 1, len(stale)))
+    if threads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            encoded = list(executor.map(encode, stale))
+    else:
+        encoded = [encode(output) for output in stale]
+    
+    for (key, filename, output_sizes), (size_bytes, seconds) in zip(stale, encoded):
+        if stats is not None:
+            stats['files'][filename] = {'bytes': size_bytes, 'seconds': seconds}
+        
+        if key == 'ico':
+            detail = f" (con tamaños: {', '.join(f'{s}x{s}' for s in output_sizes)})"
+        else:
+            size = output_sizes[0]
+            detail = f" ({size}x{size})" if key in ('standard', 'apple') else ""
+        
+        if verbose:
+            print(f"✓ Generado: {filename}{detail} - {size_bytes / 1024:.1f} KB en {seconds * 1000:.1f} ms")
+    
+    # Guardar el manifiesto con todo lo que está al día en el directorio
+    write_output_manifest(output_dir, {
+        'version': MANIFEST_VERSION,
+        'source': fingerprint,
+        'outputs': dict(
+            {name: entry for name, entry in previous_outputs.items() if (output_dir / name).exists()},
+            **{filename: output_entry(key, output_sizes, effort, quantize) for key, filename, output_sizes in outputs}
+        )
+    })
+    
+    if verbose and len(stale) < len(outputs):
+        print(f"✓ Sin cambios: {len(outputs) - len(stale)} archivos ya estaban al día")
+    
+    return generated_files
+
+
+class FaviconRenderer:
+    """
+    Genera favicons bajo demanda, en memoria y sin escribir en disco.
+    
+    Pensado para servir los favicons de logotipos subidos por usuarios sin
+    generarlos por adelantado: cada petición devuelve los bytes de un único
+    archivo (un PNG de un tamaño o el ICO con varios tamaños). El origen
+    decodificado y los archivos ya codificados se guardan en una caché LRU
+    limitada por bytes, así que una petición repetida no decodifica, no
+    redimensiona y no lee el disco.
+    
+    Ejemplo:
+    
+        renderer = FaviconRenderer(max_bytes=32 * 1024 * 1024)
+        data, content_type = renderer.get(f"logos/{tenant}.png", 'favicon-32x32.png', key=tenant)
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024, ico_sizes=None, effort='max', quantize=None):
+        """
+        Args:
+            max_bytes (int): Tamaño máximo de la caché (orígenes decodificados y archivos)
+            ico_sizes (list): Tamaños del ICO (por defecto: DEFAULT_SIZES)
+            effort (str): Esfuerzo de compresión de los PNG (ver EFFORT_LEVELS)
+            quantize (int): Reducir a paleta los PNG de hasta este tamaño (opcional)
+        """
+        self.max_bytes = max_bytes
+        self.ico_sizes = sorted(set(ico_sizes or DEFAULT_SIZES))
+        if not any(size <= 256 for size in self.ico_sizes):
+            raise ValueError("ico_sizes necesita al menos un tamaño de hasta 256 px")
+        self.effort = effort
+        self.quantize = quantize
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def parse_filename(filename):
+        """
+        Traduce el nombre pedido a la clave y los tamaños del archivo.
+        
+        Acepta los mismos nombres que genera create_favicon(): favicon.ico,
+        favicon.png, apple-touch-icon.png y favicon-NxN.png (con o sin ruta).
+        
+        Raises:
+            KeyError: Si el nombre no corresponde a ningún favicon
+        """
+        name = filename.rsplit('/', 1)[-1]
+        if name == 'favicon.ico':
+            return 'ico', None
+        if name == 'favicon.png':
+            return 'standard', [STANDARD_SIZE]
+        if name == 'apple-touch-icon.png':
+            return 'apple', [APPLE_TOUCH_SIZE]
+        if name.startswith('favicon-') and name.endswith('.png'):
+            width, _, height = name[len('favicon-'):-len('.png')].partition('x')
+            if width.isdigit() and width == height and 0 < int(width) <= SERVE_MAX_SIZE:
+                return f'png_{width}', [int(width)]
+        raise KeyError(filename)
+    
+    def _source_key(self, source, key):
+        """Identifica el origen: la clave indicada, la ruta con su fecha o el hash de los bytes."""
+        if key is not None:
+            return ('key', key)
+        if isinstance(source, (bytes, bytearray)):
+            return ('sha256', hashlib.sha256(source).hexdigest())
+        stat = os.stat(source)
+        return ('path', str(Path(source).resolve()), stat.st_size, stat.st_mtime_ns)
+    
+    def _lookup(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+            return entry
+    
+    def _store(self, cache_key, value, size):
+        """Guarda un valor y expulsa los usados hace más tiempo hasta respetar max_bytes."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(cache_key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[cache_key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+    
+    def _load(self, source, source_key):
+        """Devuelve el origen decodificado, desde la caché si ya estaba."""
+        entry = self._lookup(('source',) + source_key)
+        if entry is not None:
+            return entry[0]
+        
+        img = load_source(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source,
+                          SERVE_MAX_SIZE)
+        self._store(('source',) + source_key, img, img.width * img.height * len(img.getbands()))
+        return img
+    
+    def get(self, source, filename, key=None):
+        """
+        Devuelve el contenido de un favicon.
+        
+        Args:
+            source (str o bytes): Ruta de la imagen de origen o su contenido
+            filename (str): Archivo pedido (ver parse_filename)
+            key (str): Identificador estable del origen, por ejemplo el usuario y la
+                       versión del logotipo (opcional; sin él se consulta la fecha de
+                       la ruta o se calcula el hash de los bytes en cada petición)
+        
+        Returns:
+            tuple: Bytes del archivo y su tipo MIME
+        
+        Raises:
+            KeyError: Si el nombre no corresponde a ningún favicon
+            ValueError: Si la imagen de origen no se puede abrir
+        """
+        output_key, output_sizes = self.parse_filename(filename)
+        if output_key == 'ico':
+            output_sizes = [size for size in self.ico_sizes if size <= 256]
+        content_type = 'image/x-icon' if output_key == 'ico' else 'image/png'
+        
+        source_key = self._source_key(source, key)
+        cache_key = ('output', output_key, tuple(output_sizes)) + source_key
+        entry = self._lookup(cache_key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry[0], content_type
+        
+        with self._lock:
+            self.misses += 1
+        
+        rendered = render_sizes(self._load(source, source_key), output_sizes)
+        data = encode_output(rendered, output_key, output_sizes, self.effort, self.quantize)
+        self._store(cache_key, data, len(data))
+        return data, content_type
+    
+    def get_png(self, source, size, key=None):
+        """Devuelve los bytes del PNG de un tamaño (ver get)."""
+        return self.get(source, f"favicon-{size}x{size}.png", key=key)[0]
+    
+    def get_ico(self, source, key=None):
+        """Devuelve los bytes del ICO con todos los tamaños de ico_sizes (ver get)."""
+        return self.get(source, 'favicon.ico', key=key)[0]
+    
+    def invalidate(self, key):
+        """Elimina de la caché todo lo generado a partir de un origen con clave explícita."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[-2:] == ('key', key)]:
+                self.bytes -= self._entries.pop(cache_key)[1]
+    
+    def status(self):
+        """Devuelve los aciertos, fallos, entradas y bytes ocupados de la caché."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+def load_manifest(manifest_path, sizes=None):
+    """
+    Lee un manifiesto CSV o JSON con los favicons a generar.
+    
+    CSV: columnas 'input', 'output' y 'sizes' (opcional, separados por espacios).
+    JSON: lista de objetos con las claves 'input', 'output' y 'sizes' (opcional).
+    Las rutas relativas se resuelven respecto al directorio del manifiesto.
+    Dos entradas no pueden compartir directorio de salida.
+    
+    Args:
+        manifest_path (str): Ruta del manifiesto (.csv o .json)
+        sizes (list): Tamaños de las entradas que no indican los suyos (opcional)
+    
+    Returns:
+        list: Trabajos con 'input', 'output_dir' y 'sizes'
+    """
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"El manifiesto {manifest_path} no existe")
+    
     try:
-        img = Image.open(input_path)
+        if manifest_path.suffix.lower() == '.json':
+            entries = json.loads(manifest_path.read_text(encoding='utf-8'))
+        else:
+            with open(manifest_path, newline='', encoding='utf-8') as f:
+                entries = list(csv.DictReader(f))
     except Exception as e:
-        raise ValueError(f"Error al abrir la imagen: {e}")
+        raise ValueError(f"Error al leer el manifiesto: {e}")
     
-    # Convertir a RGBA si no lo está (necesario para transparencia)
-    if img.mode != 'RGBA':
-        img = img.convert('RGBA')
+    base_dir = manifest_path.parent
+    jobs = []
+    output_dirs = {}
+    for number, entry in enumerate(entries, start=1):
+        if not entry.get('input') or not entry.get('output'):
+            raise ValueError(f"Entrada {number} del manifiesto sin 'input' u 'output'")
+        
+        entry_sizes = entry.get('sizes') or None
+        if isinstance(entry_sizes, str):
+            entry_sizes = [int(size) for size in entry_sizes.split()]
+        
+        # Dos trabajos en el mismo directorio se pisarían los archivos y el manifiesto
+        output_dir = base_dir / entry['output']
+        key = output_dir.resolve()
+        if key in output_dirs:
+            raise ValueError(f"Las entradas {output_dirs[key]} y {number} del manifiesto "
+                             f"usan el mismo directorio de salida: {output_dir}")
+        output_dirs[key] = number
+        
+        jobs.append({
+            'input': base_dir / entry['input'],
+            'output_dir': output_dir,
+            'sizes': entry_sizes or sizes
+        })
     
-    generated_files = {}
+    return jobs
+
+
+def jobs_from_directory(input_dir, output_root, sizes=None):
+    """
+    Crea un trabajo por cada logotipo de un directorio.
     
-    # Generar PNGs individuales para cada tamaño
-    png_images = []
-    for size in sizes:
-        # Redimensionar imagen manteniendo calidad
-        resized = img.resize((size, size), Image.Resampling.LANCZOS)
-        
-        # Guardar PNG
-        png_path = output_dir / f"favicon-{size}x{size}.png"
-        resized.save(png_path, format='PNG', optimize=True)
-        generated_files[f'png_{size}'] = str(png_path)
-        png_images.append(resized)
-        
-        print(f"✓ Generado: {png_path.name}")
-    
-    # Generar archivo .ico con múltiples tamaños
-    # El formato ICO puede contener múltiples resoluciones
-    ico_path = output_dir / "favicon.ico"
-    ico_sizes = [(size, size) for size in sizes if size <= 256]  # ICO soporta hasta 256x256
-    
-    # Crear las imágenes para el ICO
-    ico_images = []
-    for size in [s[0] for s in ico_sizes]:
-        resized = img.resize((size, size), Image.Resampling.LANCZOS)
-        ico_images.append(resized)
-    
-    # Guardar como ICO
-    ico_images[0].save(
-        ico_path,
-        format='ICO',
-        sizes=ico_sizes,
-        append_images=ico_images[1:] if len(ico_images) > 1 else None
-    )
-    generated_files['ico'] = str(ico_path)
-    print(f"✓ Generado: {ico_path.name} (con tamaños: {', '.join(f'{s}x{s}' for s in [sz[0] for sz in ico_sizes])})")
+    Los favicons de cada logotipo se escriben en output_root/<nombre del logotipo>/.
+    Si varios logotipos comparten nombre con distinta extensión (logo.png y
+    logo.svg), se usa <nombre>_<extensión> para cada uno de ellos.
     
-    # Generar favicon.png estándar (32x32 es el más común)
-    standard_favicon = output_dir / "favicon.png"
-    img.resize((32, 32), Image.Resampling.LANCZOS).save(
-        standard_favicon, format='PNG', optimize=True
-    )
-    generated_files['standard'] = str(standard_favicon)
-    print(f"✓ Generado: {standard_favicon.name} (32x32)")
+    Args:
+        input_dir (str): Directorio con los logotipos
+        output_root (str): Directorio raíz de salida
+        sizes (list): Tamaños a generar (opcional)
     
-    # Generar apple-touch-icon (180x180 para iOS)
-    apple_icon = output_dir / "apple-touch-icon.png"
-    img.resize((180, 180), Image.Resampling.LANCZOS).save(
-        apple_icon, format='PNG', optimize=True
-    )
-    generated_files['apple'] = str(apple_icon)
-    print(f"✓ Generado: {apple_icon.name} (180x180)")
+    Returns:
+        list: Trabajos con 'input', 'output_dir' y 'sizes'
+    """
+    input_dir = Path(input_dir)
+    output_root = Path(output_root)
     
-    return generated_files
+    paths = [
+        path for path in sorted(input_dir.iterdir())
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    ]
+    
+    stem_counts = {}
+    for path in paths:
+        stem_counts[path.stem] = stem_counts.get(path.stem, 0) + 1
+    
+    jobs = []
+    for path in paths:
+        name = path.stem
+        if stem_counts[name] > 1:
+            name = f"{path.stem}_{path.suffix[1:].lower()}"
+        jobs.append({'input': path, 'output_dir': output_root / name, 'sizes': sizes})
+    
+    return jobs
+
+
+def _run_job(job, force=False, options=None):
+    """Genera los favicons de un trabajo del lote y mide su tiempo."""
+    stats = {'written': 0, 'skipped': 0}
+    start = time.perf_counter()
+    try:
+        create_favicon(
+            job['input'],
+            output_dir=job['output_dir'],
+            sizes=job['sizes'],
+            verbose=False,
+            force=force,
+            stats=stats,
+            **(options or {})
+        )
+        error = None
+    except Exception as e:
+        error = str(e)
+    
+    return {
+        'input': str(job['input']),
+        'output_dir': str(job['output_dir']),
+        'written': stats['written'],
+        'skipped': stats['skipped'],
+        'seconds': time.perf_counter() - start,
+        'error': error
+    }
+
+
+def create_favicons_batch(jobs, workers=None, force=False, effort='max', quantize=None, threads=None):
+    """
+    Genera los favicons de varios logotipos en un pool de procesos.
+    
+    Args:
+        jobs (list): Trabajos con 'input', 'output_dir' y 'sizes'
+        workers (int): Número de procesos (por defecto: núcleos disponibles)
+        force (bool): Regenerar todos los archivos aunque estén al día
+        effort (str): Esfuerzo de compresión de los PNG (ver EFFORT_LEVELS)
+        quantize (int): Reducir a paleta los PNG de hasta este tamaño (opcional)
+        threads (int): Hilos de codificación de cada logotipo (por defecto: núcleos
+                       disponibles con un proceso y uno con varios)
+    
+    Returns:
+        list: Un diccionario por trabajo con 'input', 'output_dir', 'written',
+              'skipped', 'seconds' y 'error', en el mismo orden que los trabajos
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if not jobs:
+        raise ValueError("No se encontraron logotipos para procesar")
+    
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    
+    options = {'effort': effort, 'quantize': quantize, 'threads': threads}
+    if workers == 1:
+        results = [_run_job(job, force, options) for job in jobs]
+    else:
+        # Cada proceso importa Pillow una vez y va tomando logotipos de la cola;
+        # los núcleos ya están repartidos entre procesos, así que por defecto codifican en serie
+        options['threads'] = threads or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_job, jobs, [force] * len(jobs), [options] * len(jobs)))
+    
+    for index, result in enumerate(results, start=1):
+        if result['error'] is None:
+            print(f"[{index}/{len(results)}] ✓ {result['input']} -> {result['output_dir']} "
+                  f"({result['written']} generados, {result['skipped']} sin cambios, "
+                  f"{result['seconds'] * 1000:.1f} ms)")
+        else:
+            print(f"[{index}/{len(results)}] ✗ {result['input']}: {result['error']}", file=sys.stderr)
+    
+    return results
 
 
 def main():
@@ -173,17 +737,66 @@ Ejemplos de uso:
   %(prog)s logo.png -o ./favicons
   %(prog)s logo.png -s 16 32 64 128
   %(prog)s logo.png -o ./output -s 16 32 48
+  %(prog)s logos/ -o ./favicons  # un subdirectorio por logotipo
+  %(prog)s --manifest tenants.csv -w 8  # lote desde manifiesto CSV/JSON
+  %(prog)s logos/ -o ./favicons --force  # regenerar aunque no haya cambios
+  %(prog)s logo.png --effort fast  # compresión zlib rápida en lugar de la máxima
+  %(prog)s logo.png --quantize 48  # PNG de hasta 48 px con paleta de 256 colores
         """
     )
     
     parser.add_argument(
         'input',
-        help='Ruta de la imagen de entrada (PNG, JPG, etc.)'
+        nargs='?',
+        help='Ruta de la imagen de entrada (PNG, JPG, etc.) o directorio de logotipos'
     )
     
     parser.add_argument(
         '-o', '--output',
-        help='Directorio de salida (por defecto: mismo directorio que la imagen de entrada)',
+        help='Directorio de salida (por defecto: mismo directorio que la imagen de entrada; '
+             'con un directorio de logotipos: [directorio]/favicons)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        help='Manifiesto CSV o JSON con columnas input, output y sizes (opcional)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Regenerar todos los archivos aunque el manifiesto indique que están al día'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help='Procesos en paralelo para el modo lote (por defecto: núcleos disponibles)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--effort',
+        help='Esfuerzo de compresión de los PNG: fast (zlib 1), balanced (zlib 6) '
+             'o max (optimize, por defecto)',
+        choices=list(EFFORT_LEVELS),
+        default='max'
+    )
+    
+    parser.add_argument(
+        '--quantize',
+        type=int,
+        metavar='N',
+        help='Reducir a una paleta de 256 colores los PNG de hasta N píxeles (más pequeños)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--threads',
+        type=int,
+        help='Hilos para codificar los archivos de un logotipo (por defecto: núcleos disponibles)',
         default=None
     )
     
@@ -197,22 +810,85 @@ Ejemplos de uso:
     
     args = parser.parse_args()
     
+    if args.input is None and args.manifest is None:
+        parser.error("se requiere una imagen de entrada, un directorio o --manifest")
+    
+    if args.workers is not None and args.workers < 1:
+        parser.error("-w/--workers debe ser al menos 1")
+    
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads debe ser al menos 1")
+    
+    if args.quantize is not None and args.quantize < 1:
+        parser.error("--quantize debe ser al menos 1")
+    
+    # Verificar dependencias solo después de validar los argumentos
+    check_and_install_dependencies()
+    
+    # Modo lote: manifiesto o directorio de logotipos
+    if args.manifest is not None or Path(args.input).is_dir():
+        try:
+            if args.manifest is not None:
+                jobs = load_manifest(args.manifest, sizes=args.sizes)
+            else:
+                output_root = args.output or Path(args.input) / 'favicons'
+                jobs = jobs_from_directory(args.input, output_root, sizes=args.sizes)
+            
+            print(f"\n🎨 Generando favicons en lote ({len(jobs)} logotipos)")
+            print("=" * 60)
+            
+            start = time.perf_counter()
+            results = create_favicons_batch(
+                jobs,
+                workers=args.workers,
+                force=args.force,
+                effort=args.effort,
+                quantize=args.quantize,
+                threads=args.threads
+            )
+            elapsed = time.perf_counter() - start
+            
+            failed = [r for r in results if r['error'] is not None]
+            unchanged = [r for r in results if r['error'] is None and r['written'] == 0]
+            print("=" * 60)
+            print(f"✅ Completados: {len(results) - len(failed)}/{len(results)} logotipos "
+                  f"en {elapsed:.2f} s ({len(results) / elapsed:.1f} logotipos/s)")
+            print(f"   Sin cambios: {len(unchanged)} logotipos")
+            if failed:
+                print(f"❌ Fallidos: {len(failed)}")
+                sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
     try:
         print(f"\n🎨 Procesando imagen: {args.input}")
         print("=" * 60)
         
+        stats = {}
         generated = create_favicon(
             args.input,
             output_dir=args.output,
-            sizes=args.sizes
+            sizes=args.sizes,
+            force=args.force,
+            stats=stats,
+            effort=args.effort,
+            quantize=args.quantize,
+            threads=args.threads
         )
         
         print("=" * 60)
         print(f"✅ ¡Completado! Se generaron {len(generated)} archivos.")
+        if stats['files']:
+            total_bytes = sum(f['bytes'] for f in stats['files'].values())
+            total_seconds = sum(f['seconds'] for f in stats['files'].values())
+            print(f"   Codificación ({args.effort}): {total_bytes / 1024:.1f} KB en {total_seconds * 1000:.1f} ms")
         print(f"\n📁 Archivos generados en: {Path(args.output or Path(args.input).parent).absolute()}")
         
         print("\n💡 Uso en HTML:")
-        print('  <link rel="icon" type="image/x-icon" href="/favicon.ico">')
+        if 'ico' in generated:
+            print('  <link rel="icon" type="image/x-icon" href="/favicon.ico">')
         print('  <link rel="icon" type="image/png" sizes="32x32" href="/favicon-32x32.png">')
         print('  <link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon.png">')
         
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+API asíncrona para ejecutar las herramientas del repositorio desde un servicio.
+Envía favicons, eliminación de fondo y conversión de PDF a Word a un pool de
+procesos compartido y devuelve resultados que se pueden esperar con await.
+
+Ejemplo:
+
+    async with JobRunner(max_workers=4, limits={'remove_background': 1}) as runner:
+        png = await runner.remove_background('foto.jpg', timeout=60)
+        docx, favicons = await asyncio.gather(
+            runner.pdf_to_docx('contrato.pdf'),
+            runner.favicon('logo.png', output_dir='static/'),
+        )
+        ico = favicons['ico']
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Los scripts del repositorio importan sus dependencias pesadas de forma diferida
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import favicon
+import pdf_a_word
+import remove_background
+
+
+# Trabajos simultáneos por defecto de cada tipo (la eliminación de fondo usa
+# mucha memoria por proceso y ONNX Runtime ya usa varios hilos)
+DEFAULT_LIMITS = {
+    'favicon': 4,
+    'remove_background': 1,
+    'pdf': 2
+}
+
+# Sesiones de rembg cargadas en cada proceso del pool, por modelo
+_sessions = {}
+
+
+def _run_quiet(function, args, kwargs):
+    """
+    Ejecuta una función en un proceso del pool sin escribir en su salida estándar.
+    
+    El registro de logging (pdf2docx informa de cada fase en stderr con nivel
+    INFO) se limita a los errores mientras dura el trabajo.
+    """
+    logging.disable(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _remove_background_job(input_path, output_path, model, alpha_matting, options, session_options):
+    """Elimina el fondo reutilizando la sesión del modelo ya cargada en este proceso."""
+    if model not in _sessions:
+        _sessions[model] = remove_background.create_session(model, **session_options)
+    
+    return remove_background.remove_background(
+        input_path,
+        output_path,
+        model=model,
+        alpha_matting=alpha_matting,
+        session=_sessions[model],
+        **options
+    )
+
+
+class JobRunner:
+    """
+    Ejecuta trabajos de las tres herramientas en un pool de procesos compartido.
+    
+    Cada tipo de trabajo tiene su propio límite de concurrencia: los trabajos
+    que lo superan esperan en el bucle de eventos sin ocupar procesos del pool,
+    así que una avalancha de PDF no bloquea los favicons.
+    
+    Cancelar un trabajo (o agotar su timeout) lo retira de la cola si todavía
+    no había empezado. Un trabajo que ya se está ejecutando no se puede
+    interrumpir en un pool de procesos: termina en segundo plano, su
+    resultado se descarta y conserva su plaza del límite hasta que el proceso
+    acaba, de modo que el límite acota los trabajos que ocupan el pool de verdad.
+    """
+    
+    def __init__(self, max_workers=None, limits=None, model_dir=None, session_options=None):
+        """
+        Args:
+            max_workers (int): Procesos del pool compartido (por defecto: núcleos disponibles)
+            limits (dict): Trabajos simultáneos por tipo ('favicon', 'remove_background',
+                           'pdf'); se combinan con DEFAULT_LIMITS
+            model_dir (str): Directorio de modelos preparado con
+                             remove_background.download_models() (opcional)
+            session_options (dict): Opciones de remove_background.create_session()
+                                    (intra_threads, inter_threads, optimization, quantized...).
+                                    Por defecto intra_threads reparte los núcleos entre las
+                                    eliminaciones de fondo que pueden correr a la vez.
+        
+        Los hilos de codificación de cada favicon se reparten del mismo modo
+        entre los favicons que pueden generarse a la vez.
+        """
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        for kind, limit in self.limits.items():
+            if kind not in DEFAULT_LIMITS:
+                raise ValueError(f"Tipo de trabajo no válido: {kind}")
+            if limit < 1:
+                raise ValueError(f"El límite de '{kind}' debe ser al menos 1")
+        
+        # Sin hilos fijados, ONNX Runtime usaría todos los núcleos en cada proceso
+        cores = os.cpu_count() or 1
+        concurrent = min(max_workers or cores, self.limits['remove_background'])
+        self.session_options = dict({'intra_threads': max(1, cores // concurrent)}, **(session_options or {}))
+        self.favicon_threads = max(1, cores // min(max_workers or cores, self.limits['favicon']))
+        
+        # Los procesos del pool heredan U2NET_HOME al crearse
+        if model_dir is not None:
+            remove_background.use_model_dir(model_dir, None)
+        
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._semaphores = {kind: asyncio.Semaphore(limit) for kind, limit in self.limits.items()}
+        self.stats = {kind: {'running': 0, 'waiting': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+                      for kind in self.limits}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.close()
+        return False
+    
+    def close(self, wait=True):
+        """Cierra el pool; los trabajos que no habían empezado se cancelan."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+    
+    def status(self):
+        """Devuelve los trabajos en curso, en espera y terminados de cada tipo."""
+        return {kind: dict(stats, limit=self.limits[kind]) for kind, stats in self.stats.items()}
+    
+    async def run(self, kind, function, *args, timeout=None, **kwargs):
+        """
+        Ejecuta function(*args, **kwargs) en el pool respetando el límite de su tipo.
+        
+        Args:
+            kind (str): Tipo de trabajo ('favicon', 'remove_background' o 'pdf')
+            function (callable): Función de nivel de módulo (se envía al proceso con pickle)
+            timeout (float): Segundos máximos de espera, cola incluida (opcional)
+        
+        Returns:
+            El valor devuelto por la función.
+        
+        Raises:
+            asyncio.TimeoutError: Si el trabajo no termina a tiempo.
+            asyncio.CancelledError: Si se cancela la tarea que espera el resultado.
+        """
+        stats = self.stats[kind]
+        loop = asyncio.get_running_loop()
+        
+        async def limited():
+            stats['waiting'] += 1
+            try:
+                await self._semaphores[kind].acquire()
+            finally:
+                stats['waiting'] -= 1
+            
+            stats['running'] += 1
+            try:
+                futuro = self._executor.submit(_run_quiet, function, args, kwargs)
+            except BaseException:
+                stats['running'] -= 1
+                self._semaphores[kind].release()
+                raise
+            
+            def liberar():
+                stats['running'] -= 1
+                self._semaphores[kind].release()
+            
+            def al_terminar(_):
+                # Se llama desde un hilo del pool: la plaza se libera en el bucle de eventos
+                try:
+                    loop.call_soon_threadsafe(liberar)
+                except RuntimeError:
+                    pass  # el bucle ya se cerró
+            
+            # La plaza se libera cuando el proceso termina, no cuando se deja de esperar
+            futuro.add_done_callback(al_terminar)
+            try:
+                return await asyncio.shield(asyncio.wrap_future(futuro))
+            except asyncio.CancelledError:
+                # Retirarlo de la cola si aún no empezó; si ya corre, conserva la plaza
+                futuro.cancel()
+                raise
+        
+        try:
+            result = await asyncio.wait_for(limited(), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            stats['cancelled'] += 1
+            raise
+        except Exception:
+            stats['failed'] += 1
+            raise
+        stats['done'] += 1
+        return result
+    
+    async def favicon(self, input_path, output_dir=None, sizes=None, force=False, timeout=None):
+        """
+        Genera los favicons de una imagen (ver favicon.create_favicon).
+        
+        Returns:
+            dict: Ruta de cada archivo generado por clave ('ico', 'standard', 'apple', 'png_32'...).
+        """
+        return await self.run(
+            'favicon',
+            favicon.create_favicon,
+            input_path,
+            output_dir=output_dir,
+            sizes=sizes,
+            verbose=False,
+            force=force,
+            threads=self.favicon_threads,
+            timeout=timeout
+        )
+    
+    async def remove_background(self, input_path, output_path=None, model='birefnet-general',
+                                alpha_matting=False, timeout=None, **options):
+        """
+        Elimina el fondo de una imagen (ver remove_background.remove_background).
+        
+        Cada proceso del pool carga la sesión de cada modelo una sola vez (con
+        remove_background.create_session y session_options) y la reutiliza en
+        los trabajos siguientes.
+        
+        Args:
+            **options: max_side, output_format, compress_level, quality
+        
+        Returns:
+            str: Ruta del archivo generado.
+        """
+        return await self.run(
+            'remove_background',
+            _remove_background_job,
+            input_path,
+            output_path,
+            model,
+            alpha_matting,
+            options,
+            self.session_options,
+            timeout=timeout
+        )
+    
+    async def pdf_to_docx(self, ruta_pdf, ruta_docx=None, timeout=None, **opciones):
+        """
+        Convierte un PDF a Word (ver pdf_a_word.convertir_pdf_a_word).
+        
+        Args:
+            **opciones: modo, paginas_por_ventana, memoria_maxima_mb, cache
+        
+        Returns:
+            str: Ruta del archivo generado.
+        """
+        return await self.run(
+            'pdf',
+            pdf_a_word.convertir_pdf_a_word,
+            ruta_pdf,
+            ruta_docx,
+            timeout=timeout,
+            **opciones
+        )
@@ -5,9 +5,20 @@ Utiliza pdf2docx para realizar la conversión preservando el formato.
 """
 
 import argparse
+import contextlib
+import functools
+import gc
+import glob
+import hashlib
+import importlib.util
+import json
+import math
 import subprocess
 import sys
 import os
+import re
+import shutil
+import time
 from pathlib import Path
 
 
@@ -21,11 +32,9 @@ def check_and_install_dependencies():
     
     missing_deps = []
     
-    # Verificar cada dependencia
+    # Verificar cada dependencia sin importarla (pdf2docx carga PyMuPDF y tarda en importarse)
     for module_name, package_name in dependencies.items():
-        try:
-            __import__(module_name)
-        except ImportError:
+        if importlib.util.find_spec(module_name) is None:
             missing_deps.append((module_name, package_name))
     
     # Si faltan dependencias, preguntar al usuario
@@ -61,24 +70,607 @@ def check_and_install_dependencies():
             sys.exit(1)
 
 
-# Verificar dependencias antes de importarlas
-check_and_install_dependencies()
+def dividir_paginas(total_paginas, procesos, paginas_por_bloque=None):
+    """
+    Divide las páginas de un documento en rangos contiguos [inicio, fin).
+    
+    Por defecto se crean unos 4 bloques por proceso para que los procesos que
+    terminan antes puedan tomar más trabajo si algunas páginas son más lentas.
+
+    Args:
+        total_paginas (int): Número de páginas del documento.
+        procesos (int): Número de procesos que convertirán los bloques.
+        paginas_por_bloque (int): Tamaño de cada bloque (opcional).
+    
+    Returns:
+        list: Lista de tuplas (inicio, fin) en orden de página.
+    """
+    if paginas_por_bloque is None:
+        paginas_por_bloque = max(1, math.ceil(total_paginas / (procesos * 4)))
+    
+    return [
+        (inicio, min(inicio + paginas_por_bloque, total_paginas))
+        for inicio in range(0, total_paginas, paginas_por_bloque)
+    ]
+
+
+class PerfilConversion:
+    """
+    Registra el tiempo y la memoria de cada página en cada fase de pdf2docx.
+    
+    Mientras el perfil está activo (with PerfilConversion() as perfil: ...) se
+    envuelven los métodos por página de pdf2docx para medirlos:
+    
+        extraccion  lectura del PDF, limpieza de bloques, márgenes y secciones
+        diseno      análisis del diseño de la página (sin contar las tablas)
+        tablas      detección de tablas reticuladas y sin bordes
+        docx        escritura de la página en el documento Word
+    
+    El tiempo de las fases anidadas no se cuenta dos veces: el de las tablas se
+    descuenta del diseño. La memoria es la residente del proceso que analiza la
+    página (en modo paralelo, la de cada proceso del pool).
+    """
+    
+    FASES = ['extraccion', 'diseno', 'tablas', 'docx']
+    
+    def __init__(self):
+        self.registros = {}
+        self._originales = []
+        self._pagina_actual = None
+        self._hijos = []
+    
+    def __enter__(self):
+        from pdf2docx.page.Page import Page
+        from pdf2docx.page.RawPageFitz import RawPageFitz
+        from pdf2docx.table.TablesConstructor import TablesConstructor
+        
+        def pagina_cruda(raw_page):
+            return raw_page.page_engine.number + 1
+        
+        def pagina(page):
+            return page.id + 1
+        
+        for nombre in ['restore', 'clean_up', 'process_font', 'calculate_margin', 'parse_section']:
+            self._envolver(RawPageFitz, nombre, 'extraccion', pagina_cruda)
+        self._envolver(Page, 'parse', 'diseno', pagina)
+        self._envolver(TablesConstructor, 'lattice_tables', 'tablas')
+        self._envolver(TablesConstructor, 'stream_tables', 'tablas')
+        self._envolver(Page, 'make_docx', 'docx', pagina)
+        return self
+    
+    def __exit__(self, *exc_info):
+        for clase, nombre, original, propio in reversed(self._originales):
+            if propio:
+                setattr(clase, nombre, original)
+            else:
+                delattr(clase, nombre)
+        self._originales = []
+        return False
+    
+    def _envolver(self, clase, nombre, fase, obtener_pagina=None):
+        """Sustituye clase.nombre por una versión que mide tiempo y memoria."""
+        original = getattr(clase, nombre)
+        perfil = self
+        
+        @functools.wraps(original)
+        def envoltura(objeto, *args, **kwargs):
+            # Sin página propia (tablas): se atribuye a la página que se está analizando
+            pagina = obtener_pagina(objeto) if obtener_pagina else perfil._pagina_actual
+            anterior = perfil._pagina_actual
+            perfil._pagina_actual = pagina
+            perfil._hijos.append(0.0)
+            memoria_inicial = _memoria_actual_mb()
+            inicio = time.perf_counter()
+            try:
+                return original(objeto, *args, **kwargs)
+            finally:
+                total = time.perf_counter() - inicio
+                hijos = perfil._hijos.pop()
+                if perfil._hijos:
+                    perfil._hijos[-1] += total
+                perfil._pagina_actual = anterior
+                perfil._anotar(pagina, fase, total - hijos, memoria_inicial, _memoria_actual_mb())
+        
+        self._originales.append((clase, nombre, original, nombre in vars(clase)))
+        setattr(clase, nombre, envoltura)
+    
+    def _anotar(self, pagina, fase, segundos, memoria_inicial, memoria_final):
+        registro = self.registros.setdefault((pagina, fase), {
+            'pagina': pagina, 'fase': fase, 'segundos': 0.0, 'memoria_mb': None, 'delta_mb': 0.0
+        })
+        registro['segundos'] += segundos
+        if memoria_final is not None:
+            registro['memoria_mb'] = memoria_final
+            if memoria_inicial is not None:
+                registro['delta_mb'] += memoria_final - memoria_inicial
+    
+    def agregar(self, registros):
+        """Añade registros medidos en otro proceso (modo paralelo)."""
+        for registro in registros:
+            self.registros[(registro['pagina'], registro['fase'])] = registro
+    
+    def lista(self):
+        """Devuelve los registros ordenados por página y fase."""
+        return sorted(
+            self.registros.values(),
+            key=lambda r: (r['pagina'] or 0, self.FASES.index(r['fase']))
+        )
+    
+    def guardar_jsonl(self, ruta, pdf=None):
+        """Escribe un registro JSON por línea (página y fase)."""
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for registro in self.lista():
+                if pdf is not None:
+                    registro = dict(registro, pdf=str(pdf))
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    
+    def paginas_mas_lentas(self, n=5):
+        """
+        Devuelve las n páginas con más tiempo total.
+        
+        Returns:
+            list: Tuplas (página, segundos totales, {fase: segundos}).
+        """
+        paginas = {}
+        for registro in self.registros.values():
+            total, fases = paginas.setdefault(registro['pagina'], [0.0, {}])
+            paginas[registro['pagina']][0] = total + registro['segundos']
+            fases[registro['fase']] = fases.get(registro['fase'], 0.0) + registro['segundos']
+        
+        ordenadas = sorted(paginas.items(), key=lambda item: item[1][0], reverse=True)
+        return [(pagina, total, fases) for pagina, (total, fases) in ordenadas[:n]]
+
 
-# Ahora importar las dependencias
-from pdf2docx import Converter
+def mostrar_perfil(perfil, n=5):
+    """Muestra el tiempo por fase y las n páginas más lentas de un perfil."""
+    registros = perfil.lista()
+    if not registros:
+        print("📈 Perfil: no hay páginas analizadas")
+        return
+    
+    print("📈 Tiempo por fase:")
+    for fase in PerfilConversion.FASES:
+        segundos = sum(r['segundos'] for r in registros if r['fase'] == fase)
+        print(f"   {fase:<11} {segundos:8.2f} s")
+    
+    print("\n🐢 Páginas más lentas:")
+    for pagina, total, fases in perfil.paginas_mas_lentas(n):
+        detalle = ", ".join(f"{fase} {fases[fase]:.2f}" for fase in PerfilConversion.FASES if fase in fases)
+        memoria = max((r['memoria_mb'] or 0) for r in registros if r['pagina'] == pagina)
+        print(f"   Página {pagina}: {total:.2f} s ({detalle}), {memoria:.0f} MB")
 
 
-def convertir_pdf_a_word(ruta_pdf, ruta_docx=None):
+def _analizar_rango(ruta_pdf, inicio, fin, perfilar=False):
+    """
+    Analiza un rango de páginas en un proceso del pool.
+
+    Returns:
+        tuple: Diseño de las páginas analizadas (formato de Converter.store()) y
+               registros del perfil (lista vacía si perfilar es False).
+    """
+    from pdf2docx import Converter
+    
+    perfil = PerfilConversion() if perfilar else None
+    cv = Converter(ruta_pdf)
+    try:
+        with perfil or contextlib.nullcontext():
+            cv.parse(inicio, fin, **cv.default_settings)
+        return cv.store(), perfil.lista() if perfil else []
+    finally:
+        cv.close()
+
+
+def _convertir_en_paralelo(ruta_pdf, ruta_docx, procesos, paginas_por_bloque=None, perfil=None):
+    """
+    Convierte un PDF analizando rangos de páginas en un pool de procesos.
+    
+    Cada proceso analiza su rango (la fase lenta: diseño, tablas e imágenes) y
+    devuelve el resultado serializado; después se restauran todos los rangos en
+    orden de página y se genera un único documento Word.
+
+    Args:
+        ruta_pdf (Path): Ruta al archivo PDF de entrada.
+        ruta_docx (Path): Ruta al archivo DOCX de salida.
+        procesos (int): Número de procesos.
+        paginas_por_bloque (int): Páginas por rango (opcional).
+        perfil (PerfilConversion): Perfil activo que recibe los registros de los procesos (opcional).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from pdf2docx import Converter
+    
+    cv = Converter(str(ruta_pdf))
+    try:
+        rangos = dividir_paginas(len(cv.fitz_doc), procesos, paginas_por_bloque)
+        print(f"   {len(cv.fitz_doc)} páginas en {len(rangos)} bloques, {procesos} procesos")
+        
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            # map() devuelve los resultados en el orden de los rangos
+            resultados = executor.map(
+                _analizar_rango,
+                [str(ruta_pdf)] * len(rangos),
+                [inicio for inicio, _ in rangos],
+                [fin for _, fin in rangos],
+                [perfil is not None] * len(rangos)
+            )
+            for datos, registros in resultados:
+                cv.restore(datos)
+                if perfil is not None:
+                    perfil.agregar(registros)
+        
+        cv.make_docx(str(ruta_docx), **cv.default_settings)
+    finally:
+        cv.close()
+
+
+# Páginas por ventana del modo de memoria acotada si solo se indica el límite de memoria
+PAGINAS_POR_VENTANA = 20
+
+
+def _memoria_actual_mb():
+    """Memoria residente actual del proceso en MB (None si no se puede medir)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _memoria_pico_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa en KB y macOS en bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _convertir_por_ventanas(ruta_pdf, ruta_docx, paginas_por_ventana, memoria_maxima_mb=None):
+    """
+    Convierte un PDF por ventanas de páginas para acotar la memoria.
+    
+    pdf2docx guarda el diseño de todas las páginas antes de escribir el DOCX.
+    Aquí cada ventana se analiza con un Converter nuevo, sus páginas se añaden
+    al documento Word y el diseño se libera antes de pasar a la siguiente, de
+    modo que la memoria depende del tamaño de la ventana y no del documento.
+    
+    Si tras analizar una ventana la memoria supera memoria_maxima_mb, las
+    siguientes ventanas se reducen a la mitad (hasta una página). Como en
+    Converter.make_docx, una página que falla al generarse se omite con un
+    aviso en lugar de abortar la conversión (ajuste ignore_page_error).
+
+    Args:
+        ruta_pdf (Path): Ruta al archivo PDF de entrada.
+        ruta_docx (Path): Ruta al archivo DOCX de salida.
+        paginas_por_ventana (int): Páginas analizadas a la vez.
+        memoria_maxima_mb (float): Límite de memoria orientativo en MB (opcional).
+    
+    Returns:
+        dict: Resumen con 'paginas', 'ventanas', 'pico_mb' y 'limite_mb'.
+    """
+    import fitz
+    from docx import Document
+    from pdf2docx.converter import Converter, MakedocxException
+    
+    with fitz.open(str(ruta_pdf)) as pdf:
+        total_paginas = len(pdf)
+    
+    documento = Document()
+    inicio = 0
+    ventanas = 0
+    while inicio < total_paginas:
+        fin = min(inicio + paginas_por_ventana, total_paginas)
+        
+        cv = Converter(str(ruta_pdf))
+        try:
+            ajustes = cv.default_settings
+            cv.parse(inicio, fin, **ajustes)
+            memoria = _memoria_actual_mb()
+            for pagina in cv.pages:
+                if not pagina.finalized:
+                    continue
+                try:
+                    pagina.make_docx(documento)
+                except Exception as e:
+                    if ajustes['raw_exceptions']:
+                        raise
+                    if ajustes['debug'] or not ajustes['ignore_page_error']:
+                        raise MakedocxException(f"Error when make page {pagina.id + 1}: {e}")
+                    print(f"   ⚠️  Página {pagina.id + 1} omitida por un error al generarla: {e}")
+        finally:
+            cv.close()
+        
+        # Liberar el diseño de la ventana antes de analizar la siguiente
+        del cv
+        gc.collect()
+        ventanas += 1
+        
+        detalle = f", {memoria:.0f} MB" if memoria is not None else ""
+        print(f"   Páginas {inicio + 1}-{fin} de {total_paginas}{detalle}")
+        
+        inicio = fin
+        if memoria_maxima_mb and memoria is not None and memoria > memoria_maxima_mb and paginas_por_ventana > 1:
+            paginas_por_ventana = max(1, paginas_por_ventana // 2)
+            print(f"   ⚠️  Límite de {memoria_maxima_mb:.0f} MB superado; ventana reducida a "
+                  f"{paginas_por_ventana} página(s)")
+    
+    documento.save(str(ruta_docx))
+    
+    return {
+        'paginas': total_paginas,
+        'ventanas': ventanas,
+        'pico_mb': _memoria_pico_mb(),
+        'limite_mb': memoria_maxima_mb
+    }
+
+
+# Modos de conversión: diseño completo con pdf2docx o solo texto con PyMuPDF
+MODOS = ['layout', 'text']
+
+# Caracteres de control que no admite el XML de un DOCX
+CARACTERES_INVALIDOS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _bloques_texto(pagina):
+    """
+    Devuelve los bloques de texto de una página en orden de lectura.
+    
+    Args:
+        pagina (fitz.Page): Página de PyMuPDF.
+    
+    Returns:
+        list: Tuplas (texto, tamaño de letra mayor, número de caracteres).
+    """
+    bloques = []
+    for bloque in pagina.get_text('dict', sort=True)['blocks']:
+        if bloque.get('type') != 0:
+            continue
+        
+        # Las líneas de un bloque forman un párrafo; las palabras cortadas con guion se unen
+        texto = ''
+        tamano = 0
+        for linea in bloque['lines']:
+            texto_linea = ''.join(span['text'] for span in linea['spans']).strip()
+            if not texto_linea:
+                continue
+            if texto.endswith('-') and texto_linea[0].isalpha():
+                texto = texto[:-1] + texto_linea
+            else:
+                texto = f"{texto} {texto_linea}" if texto else texto_linea
+            tamano = max([tamano] + [span['size'] for span in linea['spans'] if span['text'].strip()])
+        
+        texto = CARACTERES_INVALIDOS.sub('', texto)
+        if texto:
+            bloques.append((texto, tamano, len(texto)))
+    return bloques
+
+
+def _convertir_texto(ruta_pdf, ruta_docx):
+    """
+    Exporta solo el texto del PDF a un DOCX sencillo, sin reconstruir el diseño.
+    
+    Los bloques de texto se leen con PyMuPDF en orden de lectura y cada uno se
+    escribe como un párrafo. Los bloques cortos con letra claramente mayor que
+    la del cuerpo del documento se escriben como títulos. Tablas, imágenes y
+    formas se descartan.
+
+    Args:
+        ruta_pdf (Path): Ruta al archivo PDF de entrada.
+        ruta_docx (Path): Ruta al archivo DOCX de salida.
+    
+    Returns:
+        int: Número de páginas exportadas.
+    """
+    import fitz
+    from collections import Counter
+    from docx import Document
+    
+    with fitz.open(str(ruta_pdf)) as pdf:
+        paginas = [_bloques_texto(pagina) for pagina in pdf]
+    
+    # Tamaño de letra del cuerpo: el que acumula más caracteres en todo el documento
+    caracteres_por_tamano = Counter()
+    for bloques in paginas:
+        for _, tamano, caracteres in bloques:
+            caracteres_por_tamano[round(tamano)] += caracteres
+    cuerpo = caracteres_por_tamano.most_common(1)[0][0] if caracteres_por_tamano else 0
+    
+    documento = Document()
+    for numero, bloques in enumerate(paginas):
+        if numero:
+            documento.add_page_break()
+        for texto, tamano, caracteres in bloques:
+            if cuerpo and caracteres <= 200 and tamano >= cuerpo * 1.5:
+                documento.add_heading(texto, level=1)
+            elif cuerpo and caracteres <= 200 and tamano >= cuerpo * 1.2:
+                documento.add_heading(texto, level=2)
+            else:
+                documento.add_paragraph(texto)
+    documento.save(str(ruta_docx))
+    
+    return len(paginas)
+
+
+# Conversiones guardadas entre dos recuentos completos del directorio de la caché
+CACHE_RECUENTO_GUARDADOS = 64
+
+# Al expulsar se baja hasta esta fracción del tamaño máximo, para no volver a
+# recorrer el directorio en el siguiente guardado
+CACHE_MARGEN = 0.9
+
+
+class CacheConversiones:
+    """
+    Caché en disco de conversiones, direccionada por el contenido del PDF.
+    
+    Cada DOCX se guarda como <clave>.docx, donde la clave es el SHA-256 de los
+    bytes del PDF junto con las opciones del conversor. La fecha de modificación
+    de cada entrada se actualiza en cada acierto: al superar el tamaño máximo se
+    eliminan primero las menos usadas, y las que llevan más de max_dias sin
+    usarse se eliminan en cada recuento.
+    
+    El tamaño total se lleva en memoria y se actualiza en cada guardado; el
+    directorio solo se recorre en el primer guardado, al superar el máximo y
+    cada CACHE_RECUENTO_GUARDADOS conversiones (para contar lo que guardan
+    otros procesos).
+    """
+    
+    def __init__(self, directorio, max_bytes=1024 * 1024 * 1024, max_dias=None, enlazar=False):
+        """
+        Args:
+            directorio (str): Directorio de la caché (se crea si no existe)
+            max_bytes (int): Tamaño máximo total de la caché en bytes
+            max_dias (float): Días sin uso tras los que se elimina una entrada (opcional)
+            enlazar (bool): Crear enlaces duros en lugar de copias al recuperar
+                            (el DOCX de salida y la entrada comparten el archivo)
+        """
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_dias = max_dias
+        self.enlazar = enlazar
+        self.aciertos = 0
+        self.fallos = 0
+        self._bytes = None
+        self._guardados = 0
+    
+    @staticmethod
+    def clave(ruta_pdf, **opciones):
+        """Calcula la clave de caché de un PDF y las opciones del conversor."""
+        from importlib.metadata import version, PackageNotFoundError
+        
+        try:
+            opciones.setdefault('pdf2docx', version('pdf2docx'))
+        except PackageNotFoundError:
+            pass
+        
+        digest = hashlib.sha256()
+        with open(ruta_pdf, 'rb') as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(bloque)
+        digest.update(json.dumps(opciones, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _ruta(self, clave):
+        return self.directorio / f"{clave}.docx"
+    
+    def obtener(self, clave, ruta_docx):
+        """Copia (o enlaza) la entrada en ruta_docx; devuelve False si no existe."""
+        ruta = self._ruta(clave)
+        if not ruta.exists():
+            self.fallos += 1
+            return False
+        
+        ruta_docx = Path(ruta_docx)
+        try:
+            if self.enlazar:
+                try:
+                    ruta_docx.unlink(missing_ok=True)
+                    os.link(ruta, ruta_docx)
+                except OSError:
+                    # Otro sistema de archivos o sin soporte de enlaces: copiar
+                    shutil.copyfile(ruta, ruta_docx)
+            else:
+                shutil.copyfile(ruta, ruta_docx)
+        except FileNotFoundError:
+            # Expulsada por otro proceso entre la comprobación y la copia
+            self.fallos += 1
+            return False
+        
+        # Marcar como usada recientemente para la expulsión
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        self.aciertos += 1
+        return True
+    
+    def guardar(self, clave, ruta_docx):
+        """Guarda un DOCX convertido y expulsa entradas si se superan los límites."""
+        ruta = self._ruta(clave)
+        try:
+            tamano_anterior = ruta.stat().st_size
+        except OSError:
+            tamano_anterior = 0
+        
+        # Escritura atómica para no dejar archivos a medias si varios procesos comparten la caché
+        ruta_tmp = ruta.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(ruta_docx, ruta_tmp)
+        tamano = ruta_tmp.stat().st_size
+        os.replace(ruta_tmp, ruta)
+        
+        self._guardados += 1
+        if self._bytes is None or self._guardados % CACHE_RECUENTO_GUARDADOS == 0:
+            self.expulsar()
+            return
+        self._bytes += tamano - tamano_anterior
+        if self._bytes > self.max_bytes:
+            self.expulsar()
+    
+    def expulsar(self):
+        """
+        Recorre el directorio, elimina las entradas caducadas, actualiza el tamaño
+        total y, si supera el máximo, elimina las menos usadas hasta bajar de CACHE_MARGEN.
+        """
+        limite_edad = time.time() - self.max_dias * 86400 if self.max_dias else None
+        entradas = []
+        total = 0
+        for ruta in self.directorio.glob('*.docx'):
+            try:
+                stat = ruta.stat()
+            except OSError:
+                continue
+            if limite_edad is not None and stat.st_mtime < limite_edad:
+                try:
+                    ruta.unlink()
+                except OSError:
+                    pass
+                continue
+            entradas.append((stat.st_mtime, stat.st_size, ruta))
+            total += stat.st_size
+        
+        if total > self.max_bytes:
+            for _, tamano, ruta in sorted(entradas):
+                try:
+                    ruta.unlink()
+                except OSError:
+                    continue
+                total -= tamano
+                if total <= self.max_bytes * CACHE_MARGEN:
+                    break
+        
+        self._bytes = total
+
+
+def convertir_pdf_a_word(ruta_pdf, ruta_docx=None, procesos=1, paginas_por_bloque=None,
+                         paginas_por_ventana=None, memoria_maxima_mb=None, cache=None, modo='layout',
+                         perfil=None):
     """
     Convierte un archivo PDF a un documento de Word (.docx).
 
     Args:
         ruta_pdf (str): La ruta al archivo PDF de entrada.
         ruta_docx (str): La ruta al archivo DOCX de salida (opcional).
+        procesos (int): Número de procesos para analizar las páginas en paralelo.
+        paginas_por_bloque (int): Páginas por bloque en modo paralelo (opcional).
+        paginas_por_ventana (int): Convertir por ventanas de este número de páginas
+                                   para acotar la memoria (opcional).
+        memoria_maxima_mb (float): Límite de memoria orientativo en MB; activa el
+                                   modo por ventanas (opcional).
+        cache (CacheConversiones): Caché de conversiones (opcional).
+        modo (str): 'layout' reconstruye el diseño con pdf2docx; 'text' exporta
+                    solo párrafos y títulos, mucho más rápido.
+        perfil (PerfilConversion): Registra tiempo y memoria por página y fase en
+                                   modo 'layout' (opcional; desactiva la caché).
     
     Returns:
         str: Ruta del archivo generado.
     """
+    if modo not in MODOS:
+        raise ValueError(f"Modo no válido: {modo} (opciones: {', '.join(MODOS)})")
+    
     ruta_pdf = Path(ruta_pdf)
     
     # Verificar que el archivo existe
@@ -92,18 +684,371 @@ def convertir_pdf_a_word(ruta_pdf, ruta_docx=None):
         ruta_docx = Path(ruta_docx)
         ruta_docx.parent.mkdir(parents=True, exist_ok=True)
     
+    # Con perfil siempre se convierte: un acierto de caché no mediría nada
+    if perfil is not None:
+        cache = None
+    clave = None
+    if cache is not None:
+        clave = cache.clave(ruta_pdf, **_opciones_cache(modo, procesos, paginas_por_bloque,
+                                                         paginas_por_ventana, memoria_maxima_mb))
+    if cache is not None and cache.obtener(clave, ruta_docx):
+        print(f"💾 Recuperado de la caché: {ruta_pdf.name}")
+        return str(ruta_docx)
+    
     print(f"🔄 Convirtiendo: {ruta_pdf.name}")
     
     try:
-        # Crear objeto Converter y realizar conversión
-        cv = Converter(str(ruta_pdf))
-        cv.convert(str(ruta_docx))
-        cv.close()
+        if modo == 'text':
+            _convertir_texto(ruta_pdf, ruta_docx)
+        else:
+            with perfil or contextlib.nullcontext():
+                _convertir(ruta_pdf, ruta_docx, procesos, paginas_por_bloque,
+                           paginas_por_ventana, memoria_maxima_mb, perfil)
+    except Exception as e:
+        raise ValueError(f"Error al convertir el PDF: {e}")
+    
+    if cache is not None:
+        cache.guardar(clave, ruta_docx)
+    
+    return str(ruta_docx)
+
+
+def _opciones_cache(modo, procesos, paginas_por_bloque, paginas_por_ventana, memoria_maxima_mb):
+    """
+    Opciones que cambian el documento generado y forman parte de la clave de caché.
+    
+    pdf2docx analiza la estructura del documento (encabezados, pies, secciones)
+    sobre las páginas que recibe a la vez, así que dividir el PDF en bloques
+    paralelos o en ventanas puede dar un DOCX distinto del de la conversión en
+    serie. Se sigue la misma prioridad que _convertir().
+    """
+    if modo == 'text':
+        return {'modo': modo}
+    if paginas_por_ventana or memoria_maxima_mb:
+        return {'modo': modo, 'ventana': paginas_por_ventana or PAGINAS_POR_VENTANA,
+                'memoria_maxima_mb': memoria_maxima_mb}
+    if procesos > 1:
+        return {'modo': modo, 'procesos': procesos, 'paginas_por_bloque': paginas_por_bloque}
+    return {'modo': modo}
+
+
+def _convertir(ruta_pdf, ruta_docx, procesos, paginas_por_bloque, paginas_por_ventana, memoria_maxima_mb,
+               perfil=None):
+    """Convierte el PDF con el modo elegido (por ventanas, en paralelo o en serie)."""
+    from pdf2docx import Converter
+    
+    if paginas_por_ventana or memoria_maxima_mb:
+        resumen = _convertir_por_ventanas(
+            ruta_pdf,
+            ruta_docx,
+            paginas_por_ventana or PAGINAS_POR_VENTANA,
+            memoria_maxima_mb
+        )
         
-        return str(ruta_docx)
+        print(f"📊 {resumen['paginas']} páginas en {resumen['ventanas']} ventanas")
+        if resumen['pico_mb'] is not None:
+            limite = f" (límite: {resumen['limite_mb']:.0f} MB)" if resumen['limite_mb'] else ""
+            print(f"   Pico de memoria: {resumen['pico_mb']:.0f} MB{limite}")
+            if resumen['limite_mb'] and resumen['pico_mb'] > resumen['limite_mb']:
+                print("   ⚠️  El pico superó el límite; prueba con --window-pages más pequeño")
+        return
+    
+    if procesos > 1:
+        _convertir_en_paralelo(ruta_pdf, ruta_docx, procesos, paginas_por_bloque, perfil)
+        return
+    
+    # Crear objeto Converter y realizar conversión
+    cv = Converter(str(ruta_pdf))
+    cv.convert(str(ruta_docx))
+    cv.close()
+
+
+def expandir_entradas(entradas):
+    """
+    Expande rutas, directorios y patrones glob a una lista de archivos PDF.
+    
+    Cada archivo va con su ruta relativa a la raíz de la que salió (el
+    directorio indicado o la parte fija del patrón glob), para reproducir
+    los subdirectorios en el directorio de salida.
+
+    Args:
+        entradas (list): Rutas de archivos, directorios o patrones glob.
+    
+    Returns:
+        list: Tuplas (ruta, ruta relativa) sin duplicados, en el orden recibido.
+    """
+    archivos = []
+    vistos = set()
+    
+    for entrada in entradas:
+        ruta = Path(entrada)
+        if ruta.is_dir():
+            raiz = ruta
+            candidatos = sorted(p for p in ruta.rglob('*') if p.is_file() and p.suffix.lower() == '.pdf')
+        elif glob.has_magic(entrada):
+            # La raíz es la parte del patrón anterior al primer comodín
+            fijas = []
+            for parte in ruta.parts:
+                if glob.has_magic(parte):
+                    break
+                fijas.append(parte)
+            raiz = Path(*fijas) if fijas else Path('.')
+            candidatos = sorted(Path(p) for p in glob.glob(entrada, recursive=True) if Path(p).is_file())
+        else:
+            raiz = ruta.parent
+            candidatos = [ruta]
         
+        for candidato in candidatos:
+            clave = candidato.resolve()
+            if clave not in vistos:
+                vistos.add(clave)
+                try:
+                    relativa = candidato.relative_to(raiz)
+                except ValueError:
+                    relativa = Path(candidato.name)
+                archivos.append((candidato, relativa))
+    
+    return archivos
+
+
+def leer_diario(ruta_diario):
+    """
+    Lee el diario de un lote anterior.
+
+    Args:
+        ruta_diario (Path): Archivo JSON Lines con una entrada por PDF convertido.
+    
+    Returns:
+        dict: Última entrada correcta de cada PDF, indexada por su ruta absoluta.
+    """
+    completados = {}
+    if not ruta_diario.exists():
+        return completados
+    
+    with open(ruta_diario, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                # Línea a medias si el proceso se interrumpió mientras escribía
+                continue
+            if entrada.get('estado') == 'ok':
+                completados[entrada['pdf']] = entrada
+    return completados
+
+
+def _ya_convertido(ruta_pdf, entrada, ruta_docx, modo):
+    """Indica si un PDF del diario sigue igual y se convirtió al mismo DOCX, con el mismo modo y todavía presente."""
+    if entrada is None:
+        return False
+    stat = ruta_pdf.stat()
+    return (
+        entrada.get('tamano') == stat.st_size
+        and entrada.get('mtime_ns') == stat.st_mtime_ns
+        and entrada.get('modo') == modo
+        and entrada.get('docx') == str(Path(ruta_docx).resolve())
+        and Path(entrada['docx']).exists()
+    )
+
+
+def _convertir_trabajo(ruta_pdf, ruta_docx, cache=None, modo='layout', paginas_por_ventana=None,
+                       memoria_maxima_mb=None):
+    """Convierte un PDF del lote y devuelve su entrada de diario."""
+    import fitz
+    
+    stat = ruta_pdf.stat()
+    entrada = {
+        'pdf': str(ruta_pdf.resolve()),
+        'docx': None,
+        'tamano': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'modo': modo,
+        'paginas': 0,
+        'segundos': 0.0,
+        'estado': 'ok',
+        'error': None,
+        'cache': None
+    }
+    
+    inicio = time.perf_counter()
+    try:
+        with fitz.open(str(ruta_pdf)) as documento:
+            entrada['paginas'] = len(documento)
+        aciertos = cache.aciertos if cache is not None else 0
+        ruta_generada = convertir_pdf_a_word(
+            ruta_pdf,
+            ruta_docx,
+            paginas_por_ventana=paginas_por_ventana,
+            memoria_maxima_mb=memoria_maxima_mb,
+            cache=cache,
+            modo=modo
+        )
+        entrada['docx'] = str(Path(ruta_generada).resolve())
+        if cache is not None:
+            entrada['cache'] = cache.aciertos > aciertos
     except Exception as e:
-        raise ValueError(f"Error al convertir el PDF: {e}")
+        entrada['estado'] = 'error'
+        entrada['error'] = str(e)
+    entrada['segundos'] = time.perf_counter() - inicio
+    
+    return entrada
+
+
+def convertir_lote(entradas, directorio_salida=None, procesos=None, ruta_diario=None, cache=None,
+                   modo='layout', paginas_por_ventana=None, memoria_maxima_mb=None):
+    """
+    Convierte varios PDF con un pool de procesos acotado y un diario reanudable.
+    
+    Cada PDF terminado se añade al diario en cuanto acaba; si el lote se
+    interrumpe, al repetirlo se omiten los PDF que ya estaban convertidos
+    (mismo tamaño y fecha de modificación, mismo modo y mismo DOCX de destino,
+    todavía presente).
+    
+    Con directorio_salida, cada DOCX conserva la ruta del PDF relativa a su
+    entrada (pdfs/a/informe.pdf -> salida/a/informe.docx). Si aun así dos PDF
+    fueran a escribir el mismo DOCX, el lote se rechaza antes de empezar.
+
+    Args:
+        entradas (list): Rutas de archivos, directorios o patrones glob.
+        directorio_salida (str): Directorio para los DOCX (opcional, por defecto junto a cada PDF).
+        procesos (int): Documentos convertidos en paralelo (por defecto: núcleos disponibles).
+        ruta_diario (str): Archivo de diario (por defecto: .pdf_a_word-diario.jsonl en el
+                           directorio de salida o en el directorio actual).
+        cache (CacheConversiones): Caché de conversiones compartida por los procesos (opcional).
+        modo (str): Modo de conversión ('layout' o 'text').
+        paginas_por_ventana (int): Convertir cada PDF por ventanas de este número de
+                                   páginas (opcional).
+        memoria_maxima_mb (float): Límite de memoria orientativo por proceso en MB;
+                                   activa el modo por ventanas (opcional).
+    
+    Returns:
+        list: Entradas de diario de los PDF procesados u omitidos, en orden de entrada.
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    
+    archivos = expandir_entradas(entradas)
+    if not archivos:
+        raise ValueError("No se encontraron archivos PDF para convertir")
+    
+    if directorio_salida is not None:
+        directorio_salida = Path(directorio_salida)
+        directorio_salida.mkdir(parents=True, exist_ok=True)
+    
+    if ruta_diario is None:
+        ruta_diario = (directorio_salida or Path.cwd()) / '.pdf_a_word-diario.jsonl'
+    ruta_diario = Path(ruta_diario)
+    completados = leer_diario(ruta_diario)
+    
+    # Destino de cada PDF; dos PDF con el mismo destino se pisarían en silencio
+    destinos = []
+    origenes = {}
+    for ruta_pdf, relativa in archivos:
+        if directorio_salida is not None:
+            ruta_docx = directorio_salida / relativa.with_suffix('.docx')
+        else:
+            ruta_docx = ruta_pdf.parent / f"{ruta_pdf.stem}.docx"
+        clave = str(ruta_docx.resolve())
+        if clave in origenes:
+            raise ValueError(f"{origenes[clave]} y {ruta_pdf} se convertirían en el mismo archivo {ruta_docx}")
+        origenes[clave] = ruta_pdf
+        destinos.append(ruta_docx)
+    
+    resultados = [None] * len(archivos)
+    pendientes = []
+    for posicion, ((ruta_pdf, _), ruta_docx) in enumerate(zip(archivos, destinos)):
+        if not ruta_pdf.exists():
+            resultados[posicion] = {
+                'pdf': str(ruta_pdf), 'docx': None, 'paginas': 0, 'segundos': 0.0,
+                'estado': 'error', 'error': f"El archivo {ruta_pdf} no existe"
+            }
+            continue
+        
+        entrada = completados.get(str(ruta_pdf.resolve()))
+        if _ya_convertido(ruta_pdf, entrada, ruta_docx, modo):
+            resultados[posicion] = dict(entrada, estado='omitido')
+            continue
+        
+        pendientes.append((posicion, ruta_pdf, ruta_docx))
+    
+    omitidos = sum(1 for r in resultados if r is not None and r['estado'] == 'omitido')
+    if omitidos:
+        print(f"↷ {omitidos} PDF ya convertidos según el diario {ruta_diario}")
+    
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(pendientes) or 1))
+    terminados = 0
+    
+    with open(ruta_diario, 'a', encoding='utf-8') as diario, \
+            ProcessPoolExecutor(max_workers=procesos) as executor:
+        en_curso = {}
+        siguiente = 0
+        
+        # Mantener como máximo 2 trabajos por proceso en cola para no cargar miles a la vez
+        while siguiente < len(pendientes) or en_curso:
+            while siguiente < len(pendientes) and len(en_curso) < procesos * 2:
+                posicion, ruta_pdf, ruta_docx = pendientes[siguiente]
+                futuro = executor.submit(_convertir_trabajo, ruta_pdf, ruta_docx, cache, modo,
+                                         paginas_por_ventana, memoria_maxima_mb)
+                en_curso[futuro] = (posicion, ruta_pdf)
+                siguiente += 1
+            
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                posicion, ruta_pdf = en_curso.pop(futuro)
+                try:
+                    entrada = futuro.result()
+                except Exception as e:
+                    entrada = {
+                        'pdf': str(ruta_pdf.resolve()), 'docx': None, 'modo': modo, 'paginas': 0,
+                        'segundos': 0.0, 'estado': 'error', 'error': str(e)
+                    }
+                
+                # Registrar en el diario de inmediato para poder reanudar tras un fallo
+                diario.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+                diario.flush()
+                os.fsync(diario.fileno())
+                
+                resultados[posicion] = entrada
+                terminados += 1
+                if entrada['estado'] == 'ok':
+                    print(f"[{terminados}/{len(pendientes)}] ✓ {ruta_pdf.name} "
+                          f"({entrada['paginas']} páginas, {entrada['segundos']:.1f} s)")
+                else:
+                    print(f"[{terminados}/{len(pendientes)}] ✗ {ruta_pdf.name}: {entrada['error']}",
+                          file=sys.stderr)
+    
+    return resultados
+
+
+def mostrar_resumen_lote(resultados, segundos_totales):
+    """Muestra el resumen de páginas por segundo y fallos de un lote."""
+    correctos = [r for r in resultados if r['estado'] == 'ok']
+    omitidos = [r for r in resultados if r['estado'] == 'omitido']
+    fallidos = [r for r in resultados if r['estado'] == 'error']
+    
+    print("=" * 50)
+    print(f"✅ Convertidos: {len(correctos)}   ↷ Omitidos: {len(omitidos)}   ❌ Fallidos: {len(fallidos)}")
+    
+    if correctos:
+        print("\n📄 Rendimiento por archivo:")
+        for r in correctos:
+            velocidad = r['paginas'] / r['segundos'] if r['segundos'] else 0
+            print(f"   {Path(r['pdf']).name}: {r['paginas']} páginas en {r['segundos']:.1f} s "
+                  f"({velocidad:.2f} páginas/s)")
+        
+        paginas = sum(r['paginas'] for r in correctos)
+        print(f"\n⏱️  Total: {paginas} páginas en {segundos_totales:.1f} s "
+              f"({paginas / segundos_totales:.2f} páginas/s)")
+        
+        con_cache = [r for r in correctos if r.get('cache') is not None]
+        if con_cache:
+            aciertos = sum(1 for r in con_cache if r['cache'])
+            print(f"\n💾 Caché: {aciertos} aciertos, {len(con_cache) - aciertos} fallos "
+                  f"({aciertos / len(con_cache) * 100:.1f}% de aciertos)")
+    
+    if fallidos:
+        print("\n❌ Fallos:")
+        for r in fallidos:
+            print(f"   {r['pdf']}: {r['error']}")
 
 
 def modo_interactivo():
@@ -153,14 +1098,21 @@ Ejemplos de uso:
   %(prog)s documento.pdf
   %(prog)s documento.pdf -o resultado.docx
   %(prog)s documento.pdf --output carpeta/resultado.docx
+  %(prog)s contrato.pdf -w 8  # analiza las páginas en 8 procesos
+  %(prog)s documento.pdf --mode text  # solo texto, para indexar
+  %(prog)s lento.pdf --profile perfil.jsonl --profile-top 10  # páginas más lentas
+  %(prog)s informe_2000p.pdf --window-pages 10 --max-memory 1024  # memoria acotada
+  %(prog)s pdfs/ -d salida/ -w 8  # lote: 8 documentos a la vez, reanudable
+  %(prog)s "volcado/**/*.pdf" -d salida/ --journal lote.jsonl
+  %(prog)s adjuntos/ -d salida/ --cache-dir ~/.cache/pdf_a_word  # reutiliza conversiones
   %(prog)s   # Modo interactivo
         """
     )
     
     parser.add_argument(
         'input',
-        nargs='?',
-        help='Ruta del archivo PDF de entrada'
+        nargs='*',
+        help='Archivos PDF de entrada, directorios o patrones glob'
     )
     
     parser.add_argument(
@@ -169,20 +1121,212 @@ Ejemplos de uso:
         default=None
     )
     
+    parser.add_argument(
+        '--mode',
+        choices=MODOS,
+        help='layout: reconstruye el diseño (tablas, imágenes); '
+             'text: solo párrafos y títulos, mucho más rápido (por defecto: layout)',
+        default='layout'
+    )
+    
+    parser.add_argument(
+        '--window-pages',
+        type=int,
+        help=f'Convertir por ventanas de N páginas para acotar la memoria '
+             f'(por defecto con --max-memory: {PAGINAS_POR_VENTANA})',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--max-memory',
+        type=float,
+        help='Límite de memoria orientativo en MB: reduce la ventana si se supera '
+             'y se informa en el resumen',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-d', '--output-dir',
+        help='Directorio de salida para convertir varios PDF (por defecto: junto a cada PDF)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help='Procesos en paralelo: páginas de un PDF o, en modo lote, documentos '
+             '(por defecto: 1; en lote: núcleos disponibles)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--journal',
+        help='Diario del modo lote para reanudar (por defecto: .pdf_a_word-diario.jsonl '
+             'en el directorio de salida)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--chunk-pages',
+        type=int,
+        help='Páginas por bloque en modo paralelo (por defecto: automático)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--profile',
+        metavar='ARCHIVO',
+        help='Registrar tiempo y memoria por página y fase en un archivo JSON lines '
+             'y mostrar las páginas más lentas',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--profile-top',
+        type=int,
+        help='Páginas más lentas a mostrar con --profile (por defecto: 5)',
+        default=5
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Directorio de caché de conversiones por contenido del PDF (opcional)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--cache-size-mb',
+        type=int,
+        help='Tamaño máximo de la caché en MB (por defecto: 1024)',
+        default=1024
+    )
+    
+    parser.add_argument(
+        '--cache-max-age',
+        type=float,
+        help='Días sin uso tras los que se eliminan entradas de la caché (opcional)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--cache-link',
+        action='store_true',
+        help='Recuperar de la caché con enlaces duros en lugar de copias'
+    )
+    
     args = parser.parse_args()
     
+    if args.workers is not None and args.workers < 1:
+        parser.error("-w/--workers debe ser al menos 1")
+    
+    if args.chunk_pages is not None and args.chunk_pages < 1:
+        parser.error("--chunk-pages debe ser al menos 1")
+    
+    if args.window_pages is not None and args.window_pages < 1:
+        parser.error("--window-pages debe ser al menos 1")
+    
+    # Varias entradas, directorios o patrones: modo lote
+    modo_lote = (
+        len(args.input) > 1
+        or args.output_dir is not None
+        or args.journal is not None
+        or (args.input and (Path(args.input[0]).is_dir() or glob.has_magic(args.input[0])))
+    )
+    
+    # En modo lote -w reparte documentos; en un solo PDF reparte páginas
+    if not modo_lote and (args.window_pages or args.max_memory) and (args.workers or 1) > 1:
+        parser.error("--window-pages/--max-memory no se combinan con -w/--workers")
+    
+    if modo_lote and args.chunk_pages is not None:
+        parser.error("--chunk-pages divide un solo PDF entre procesos y no se usa en modo lote")
+    
+    if modo_lote and args.output is not None:
+        parser.error("-o/--output solo admite un PDF; usa -d/--output-dir para varios")
+    
+    if modo_lote and args.profile is not None:
+        parser.error("--profile solo admite un PDF")
+    
+    if args.mode == 'text' and (args.window_pages or args.max_memory or args.chunk_pages):
+        parser.error("--mode text no admite --window-pages, --max-memory ni --chunk-pages")
+    
+    if args.profile is not None and args.mode == 'text':
+        parser.error("--profile mide las fases de pdf2docx y no admite --mode text")
+    
+    if args.profile_top < 1:
+        parser.error("--profile-top debe ser al menos 1")
+    
+    if args.cache_size_mb < 1:
+        parser.error("--cache-size-mb debe ser al menos 1")
+    
+    if args.cache_dir is None and (args.cache_max_age is not None or args.cache_link):
+        parser.error("--cache-max-age y --cache-link requieren --cache-dir")
+    
+    # Verificar dependencias solo después de validar los argumentos
+    check_and_install_dependencies()
+    
+    cache = None
+    if args.cache_dir is not None:
+        cache = CacheConversiones(
+            args.cache_dir,
+            max_bytes=args.cache_size_mb * 1024 * 1024,
+            max_dias=args.cache_max_age,
+            enlazar=args.cache_link
+        )
+    
+    if modo_lote:
+        try:
+            print(f"\n🎨 Convirtiendo en lote ({len(args.input)} entrada(s))")
+            print("=" * 50)
+            
+            inicio = time.perf_counter()
+            resultados = convertir_lote(
+                args.input,
+                directorio_salida=args.output_dir,
+                procesos=args.workers,
+                ruta_diario=args.journal,
+                cache=cache,
+                modo=args.mode,
+                paginas_por_ventana=args.window_pages,
+                memoria_maxima_mb=args.max_memory
+            )
+            mostrar_resumen_lote(resultados, time.perf_counter() - inicio)
+            
+            if any(r['estado'] == 'error' for r in resultados):
+                sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
     try:
         # Si no se proporciona archivo, usar modo interactivo
-        if args.input is None:
+        if not args.input:
             ruta_pdf, ruta_docx = modo_interactivo()
         else:
-            ruta_pdf = args.input
+            ruta_pdf = args.input[0]
             ruta_docx = args.output
         
         print(f"\n🎨 Procesando archivo: {ruta_pdf}")
         print("=" * 50)
         
-        output_file = convertir_pdf_a_word(ruta_pdf, ruta_docx)
+        perfil = PerfilConversion() if args.profile is not None else None
+        output_file = convertir_pdf_a_word(
+            ruta_pdf,
+            ruta_docx,
+            procesos=args.workers or 1,
+            paginas_por_bloque=args.chunk_pages,
+            paginas_por_ventana=args.window_pages,
+            memoria_maxima_mb=args.max_memory,
+            cache=cache,
+            modo=args.mode,
+            perfil=perfil
+        )
+        
+        if perfil is not None:
+            print("=" * 50)
+            mostrar_perfil(perfil, args.profile_top)
+            perfil.guardar_jsonl(args.profile, pdf=ruta_pdf)
+            print(f"\n📝 Perfil guardado en: {args.profile}")
         
         print("=" * 50)
         print(f"✅ ¡Conversión exitosa!")
@@ -5,8 +5,17 @@ Utiliza rembg para eliminar automáticamente el fondo y generar imágenes con tr
 """
 
 import argparse
+import glob
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import queue
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
 
 
@@ -21,11 +30,9 @@ def check_and_install_dependencies():
     
     missing_deps = []
     
-    # Verificar cada dependencia
+    # Verificar cada dependencia sin importarla (rembg carga onnxruntime y tarda segundos)
     for module_name, package_name in dependencies.items():
-        try:
-            __import__(module_name)
-        except ImportError:
+        if importlib.util.find_spec(module_name) is None:
             missing_deps.append((module_name, package_name))
     
     # Si faltan dependencias, preguntar al usuario
@@ -79,119 +86,2017 @@ def check_and_install_dependencies():
             sys.exit(1)
 
 
-# Verificar dependencias antes de importarlas
-check_and_install_dependencies()
+# Extensiones de imagen que se buscan al recibir un directorio
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
 
-# Ahora importar las dependencias
-from rembg import remove, new_session
-from PIL import Image
-import io
+# Modelos disponibles (usados por la CLI y por el modo servidor)
+MODELS = ['birefnet-general', 'birefnet-portrait', 'isnet-general-use', 'u2net']
+
+# Formatos de salida: sufijo del archivo generado y tipo MIME
+OUTPUT_FORMATS = {
+    'png': {'suffix': '_no_bg.png', 'content_type': 'image/png'},
+    'webp': {'suffix': '_no_bg.webp', 'content_type': 'image/webp'},
+    'mask': {'suffix': '_mask.png', 'content_type': 'image/png'}
+}
+
+# Parámetros de alpha matting (también forman parte de la clave de caché)
+ALPHA_MATTING_PARAMS = {
+    'alpha_matting_foreground_threshold': 240,
+    'alpha_matting_background_threshold': 10,
+    'alpha_matting_erode_size': 10
+}
+
+# Preprocesado de cada modelo para la inferencia por lotes, el mismo que usan las
+# sesiones de rembg: media, desviación, tamaño de entrada y si la salida son logits
+MODEL_INPUTS = {
+    'birefnet-general': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), (1024, 1024), True),
+    'birefnet-portrait': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), (1024, 1024), True),
+    'isnet-general-use': ((0.5, 0.5, 0.5), (1.0, 1.0, 1.0), (1024, 1024), False),
+    'u2net': ((0.485, 0.456, 0.406), (0.229, 0.224, 0.225), (320, 320), False)
+}
+
+# Imágenes por pasada del modelo en la inferencia por lotes
+BATCH_SIZE = 4
+
+# Manifiesto con el tamaño y el SHA-256 de cada modelo de un directorio compartido
+MODEL_MANIFEST = 'models.json'
+
+
+def _session_class(model):
+    """Devuelve la clase de sesión de rembg de un modelo."""
+    from rembg.sessions import sessions_class
+    
+    for session_class in sessions_class:
+        if session_class.name() == model:
+            return session_class
+    raise ValueError(f"Modelo desconocido para rembg: {model}")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_model_manifest(model_dir):
+    """Lee el manifiesto de modelos de un directorio (vacío si no existe)."""
+    try:
+        return json.loads((Path(model_dir) / MODEL_MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
 
 
-def remove_background(input_path, output_path=None, model='birefnet-general', alpha_matting=False):
+def verify_models(model_dir, models=None, full=True):
     """
-    Elimina el fondo de una imagen.
+    Comprueba los modelos de un directorio compartido contra su manifiesto.
     
     Args:
-        input_path (str): Ruta de la imagen de entrada
-        output_path (str): Ruta de la imagen de salida (opcional)
-        model (str): Modelo a usar ('birefnet-general', 'birefnet-portrait', 'isnet-general-use', 'u2net')
-        alpha_matting (bool): Usar alpha matting para bordes más suaves
+        model_dir (str): Directorio de modelos
+        models (list): Modelos a comprobar (por defecto: todos los del manifiesto)
+        full (bool): Comprobar el SHA-256 (lee cada archivo entero); si es False
+                     solo se comprueba que exista y tenga el tamaño esperado
     
     Returns:
-        str: Ruta del archivo generado
+        dict: Problema de cada modelo (None si está bien)
     """
-    input_path = Path(input_path)
+    model_dir = Path(model_dir)
+    manifest = read_model_manifest(model_dir)
+    problems = {}
     
-    # Verificar que el archivo existe
-    if not input_path.exists():
-        raise FileNotFoundError(f"El archivo {input_path} no existe")
+    for model in models or list(manifest):
+        entry = manifest.get(model)
+        if entry is None:
+            problems[model] = "no está en el manifiesto"
+            continue
+        
+        path = model_dir / entry['file']
+        try:
+            size = path.stat().st_size
+        except OSError:
+            problems[model] = f"falta el archivo {path}"
+            continue
+        
+        if size != entry['size']:
+            problems[model] = f"tamaño {size} distinto del esperado {entry['size']}"
+        elif full and _file_sha256(path) != entry['sha256']:
+            problems[model] = "el SHA-256 no coincide"
+        else:
+            problems[model] = None
     
-    # Determinar ruta de salida
-    if output_path is None:
-        output_path = input_path.parent / f"{input_path.stem}_no_bg.png"
-    else:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+    return problems
+
+
+def download_models(model_dir, models=None):
+    """
+    Descarga los modelos en un directorio compartido y guarda su manifiesto.
+    
+    La descarga la hace rembg (con su comprobación MD5) usando model_dir como
+    U2NET_HOME; después se guarda el tamaño y el SHA-256 de cada archivo para
+    poder verificarlos sin conexión. Los modelos ya presentes y correctos no se
+    vuelven a descargar; los dañados se borran y se descargan de nuevo.
+    
+    Args:
+        model_dir (str): Directorio de modelos (se crea si no existe)
+        models (list): Modelos a descargar (por defecto: MODELS)
+    
+    Returns:
+        dict: Manifiesto con 'file', 'size' y 'sha256' de cada modelo
+    """
+    model_dir = Path(model_dir).resolve()
+    model_dir.mkdir(parents=True, exist_ok=True)
+    os.environ['U2NET_HOME'] = str(model_dir)
+    
+    manifest = read_model_manifest(model_dir)
+    for model in models or MODELS:
+        if model in manifest:
+            problem = verify_models(model_dir, [model])[model]
+            if problem is None:
+                print(f"✓ {model}: ya descargado y verificado")
+                continue
+            print(f"⚠️  {model}: {problem}; se descarga de nuevo")
+            (model_dir / manifest[model]['file']).unlink(missing_ok=True)
+        
+        print(f"⬇️  Descargando {model}...")
+        path = Path(_session_class(model).download_models())
+        manifest[model] = {
+            'file': path.relative_to(model_dir).as_posix(),
+            'size': path.stat().st_size,
+            'sha256': _file_sha256(path)
+        }
+        print(f"✓ {model}: {manifest[model]['file']} ({manifest[model]['size'] / (1024 * 1024):.0f} MB)")
+        
+        # Guardar tras cada modelo para no perder lo descargado si falla el siguiente
+        tmp_path = model_dir / f"{MODEL_MANIFEST}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        os.replace(tmp_path, model_dir / MODEL_MANIFEST)
+    
+    return manifest
+
+
+def use_model_dir(model_dir, models, verify=False):
+    """
+    Hace que rembg cargue los modelos de un directorio compartido sin escribir en él.
+    
+    Antes de cargar se comprueba que cada modelo esté en el manifiesto con el
+    tamaño esperado (o con su SHA-256 si verify es True), de modo que nunca se
+    intenta una descarga: un modelo que falta es un error inmediato.
+    
+    Args:
+        model_dir (str): Directorio preparado con download_models()
+        models (list): Modelos que se van a usar
+        verify (bool): Comprobar también el SHA-256
+    
+    Raises:
+        FileNotFoundError: Si falta algún modelo o no coincide con el manifiesto
+    """
+    model_dir = Path(model_dir).resolve()
+    problems = {model: problem for model, problem in verify_models(model_dir, models, full=verify).items()
+                if problem is not None}
+    if problems:
+        details = "; ".join(f"{model}: {problem}" for model, problem in problems.items())
+        raise FileNotFoundError(
+            f"Modelos no disponibles en {model_dir} ({details}). "
+            f"Prepáralos con --download-models --model-dir {model_dir}"
+        )
+    
+    # rembg busca los modelos en U2NET_HOME; los procesos hijos heredan la variable
+    os.environ['U2NET_HOME'] = str(model_dir)
+
+
+# Niveles de optimización del grafo de ONNX Runtime (nombre en la CLI -> GraphOptimizationLevel)
+OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL'
+}
+
+# Directorio donde se guardan las variantes int8 generadas de cada modelo
+QUANTIZED_DIR = Path(os.environ.get('XDG_CACHE_HOME', '~/.cache')).expanduser() / 'remove_background'
+
+
+def quantize_model(model, quantized_dir=None):
+    """
+    Devuelve la variante int8 de un modelo, generándola la primera vez.
+    
+    Se usa cuantización dinámica de ONNX Runtime (pesos en int8, activaciones
+    cuantizadas al vuelo). El archivo se guarda en quantized_dir con el tamaño
+    y la fecha del modelo original en el nombre, así que se regenera si el
+    modelo cambia. El directorio de modelos original no se modifica.
+    
+    Args:
+        model (str): Modelo a cuantizar
+        quantized_dir (str): Directorio de las variantes int8 (por defecto: QUANTIZED_DIR)
+    
+    Returns:
+        Path: Ruta del modelo cuantizado
+    """
+    source = Path(_session_class(model).download_models())
+    stat = source.stat()
+    
+    quantized_dir = Path(quantized_dir or QUANTIZED_DIR)
+    quantized_dir.mkdir(parents=True, exist_ok=True)
+    target = quantized_dir / f"{model}-{stat.st_size}-{stat.st_mtime_ns}.int8.onnx"
+    if target.exists():
+        return target
     
-    # Cargar imagen
     try:
-        with open(input_path, 'rb') as f:
-            input_data = f.read()
-    except Exception as e:
-        raise ValueError(f"Error al leer la imagen: {e}")
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError as e:
+        raise ValueError(f"La cuantización requiere el paquete onnx (pip install onnx): {e}")
     
-    print(f"🔄 Procesando imagen con modelo '{model}'...")
-    if alpha_matting:
-        print("   (usando alpha matting para bordes suaves)")
+    print(f"🔄 Generando variante int8 de '{model}' (solo la primera vez)...")
+    start = time.perf_counter()
+    tmp_path = target.with_suffix(f".{os.getpid()}.tmp")
+    quantize_dynamic(str(source), str(tmp_path), weight_type=QuantType.QUInt8)
+    os.replace(tmp_path, target)
+    print(f"   {source.stat().st_size / (1024 * 1024):.0f} MB -> "
+          f"{target.stat().st_size / (1024 * 1024):.0f} MB en {time.perf_counter() - start:.1f} s")
+    return target
+
+
+def create_session(model, intra_threads=None, inter_threads=None, optimization=None, memory_arena=True,
+                   quantized=False, quantized_dir=None, providers=None):
+    """
+    Crea una sesión de rembg con opciones de ONNX Runtime ajustadas.
     
-    # Eliminar fondo usando el modelo especificado
+    Sin argumentos equivale a new_session(model). Con intra_threads e
+    inter_threads se fijan los hilos (si no, rembg usa OMP_NUM_THREADS o todos
+    los núcleos); optimization elige el nivel de optimización del grafo y
+    memory_arena activa la reserva de memoria en bloque de la CPU.
+    
+    Args:
+        model (str): Modelo a cargar
+        intra_threads (int): Hilos dentro de cada operador (opcional)
+        inter_threads (int): Hilos entre operadores independientes (opcional)
+        optimization (str): 'disable', 'basic', 'extended' o 'all' (opcional)
+        memory_arena (bool): Usar el arena de memoria de la CPU
+        quantized (bool): Usar la variante int8 del modelo (ver quantize_model)
+        quantized_dir (str): Directorio de las variantes int8 (opcional)
+        providers (list): Proveedores de ejecución, por ejemplo ['CPUExecutionProvider']
+    
+    Returns:
+        Sesión de rembg (atributo quantized a True si usa la variante int8)
+    """
+    import onnxruntime as ort
+    from rembg import new_session
+    
+    sess_opts = ort.SessionOptions()
+    if intra_threads:
+        sess_opts.intra_op_num_threads = intra_threads
+    if inter_threads:
+        sess_opts.inter_op_num_threads = inter_threads
+    if optimization:
+        sess_opts.graph_optimization_level = getattr(ort.GraphOptimizationLevel, OPTIMIZATION_LEVELS[optimization])
+    sess_opts.enable_cpu_mem_arena = memory_arena
+    
+    kwargs = {'providers': providers} if providers else {}
+    
+    if not quantized:
+        session = new_session(model, sess_opts=sess_opts, **kwargs)
+        session.quantized = False
+        return session
+    
+    path = quantize_model(model, quantized_dir)
+    session_class = _session_class(model)
+    
+    # Misma clase (mismo preprocesado y postprocesado) pero cargando el archivo int8
+    class QuantizedSession(session_class):
+        @classmethod
+        def download_models(cls, *args, **kwargs):
+            return str(path)
+    
+    if 'OMP_NUM_THREADS' in os.environ:
+        threads = int(os.environ['OMP_NUM_THREADS'])
+        sess_opts.inter_op_num_threads = sess_opts.inter_op_num_threads or threads
+        sess_opts.intra_op_num_threads = sess_opts.intra_op_num_threads or threads
+    
+    session = QuantizedSession(model, sess_opts, **kwargs)
+    session.quantized = True
+    return session
+
+
+# Parámetros del filtro guiado usado al reescalar la máscara (modo --max-side)
+GUIDED_FILTER_RADIUS = 4
+GUIDED_FILTER_EPS = 1e-3
+
+
+def _box_filter(values, radius):
+    """Media de cada píxel en una ventana cuadrada de lado 2*radius+1 (bordes replicados)."""
+    import numpy as np
+    
+    size = 2 * radius + 1
+    padded = np.pad(values, ((radius + 1, radius), (radius + 1, radius)), mode='edge')
+    summed = padded.cumsum(axis=0).cumsum(axis=1)
+    window = (summed[size:, size:] - summed[:-size, size:]
+              - summed[size:, :-size] + summed[:-size, :-size])
+    return (window / (size * size)).astype(np.float32)
+
+
+def _guided_upsample_mask(mask_small, guide_small, guide_full, radius=GUIDED_FILTER_RADIUS,
+                          eps=GUIDED_FILTER_EPS):
+    """
+    Reescala una máscara a la resolución original ajustándola a los bordes de la imagen.
+    
+    Implementa el filtro guiado rápido: los coeficientes lineales se calculan
+    a baja resolución y solo ellos se interpolan al tamaño completo, por lo que
+    el coste a resolución completa es una multiplicación y una suma por píxel.
+    
+    Args:
+        mask_small (PIL.Image): Máscara (modo L) a la resolución de inferencia
+        guide_small (PIL.Image): Imagen guía (modo L) a la resolución de inferencia
+        guide_full (PIL.Image): Imagen guía (modo L) a la resolución original
+        radius (int): Radio de la ventana del filtro a baja resolución
+        eps (float): Regularización (más alto = máscara más suave)
+    
+    Returns:
+        PIL.Image: Máscara (modo L) a la resolución original
+    """
+    import numpy as np
+    from PIL import Image
+    
+    guide = np.asarray(guide_small, dtype=np.float32) / 255.0
+    mask = np.asarray(mask_small, dtype=np.float32) / 255.0
+    
+    mean_guide = _box_filter(guide, radius)
+    mean_mask = _box_filter(mask, radius)
+    covariance = _box_filter(guide * mask, radius) - mean_guide * mean_mask
+    variance = _box_filter(guide * guide, radius) - mean_guide * mean_guide
+    
+    a = covariance / (variance + eps)
+    b = mean_mask - a * mean_guide
+    
+    # Interpolar solo los coeficientes (imágenes en modo F) a la resolución original
+    size = guide_full.size
+    a_full = Image.fromarray(_box_filter(a, radius), mode='F').resize(size, Image.Resampling.BILINEAR)
+    b_full = Image.fromarray(_box_filter(b, radius), mode='F').resize(size, Image.Resampling.BILINEAR)
+    
+    alpha = np.asarray(a_full) * (np.asarray(guide_full, dtype=np.float32) / 255.0)
+    alpha += np.asarray(b_full)
+    np.clip(alpha * 255.0, 0, 255, out=alpha)
+    return Image.fromarray(alpha.astype(np.uint8), mode='L')
+
+
+# Alpha matting limitado al borde (alpha_matting='edge'): lado de cada tesela
+# y contexto que se añade alrededor para que la solución no dependa del corte
+EDGE_MATTING_TILE = 256
+EDGE_MATTING_MARGIN = 32
+
+
+def _matting_trimap(mask):
+    """Trimap de rembg: 255 primer plano, 0 fondo y 128 en la franja dudosa del borde."""
+    import numpy as np
+    from scipy.ndimage import binary_erosion
+    
+    mask = np.asarray(mask)
+    is_foreground = mask > ALPHA_MATTING_PARAMS['alpha_matting_foreground_threshold']
+    is_background = mask < ALPHA_MATTING_PARAMS['alpha_matting_background_threshold']
+    
+    erode_size = ALPHA_MATTING_PARAMS['alpha_matting_erode_size']
+    structure = np.ones((erode_size, erode_size), dtype=np.uint8) if erode_size > 0 else None
+    is_foreground = binary_erosion(is_foreground, structure=structure)
+    is_background = binary_erosion(is_background, structure=structure, border_value=1)
+    
+    trimap = np.full(mask.shape, 128, dtype=np.uint8)
+    trimap[is_foreground] = 255
+    trimap[is_background] = 0
+    return trimap
+
+
+def _solve_matting_tile(image, trimap, mask):
+    """
+    Resuelve el alpha matting de un recorte (closed-form, como rembg).
+    
+    Si el recorte no tiene píxeles conocidos suficientes para el sistema se
+    usa la máscara del modelo tal cual.
+    
+    Returns:
+        tuple: Alfa (float, 0-1) y color del primer plano (float, 0-1) del recorte
+    """
+    import numpy as np
+    from pymatting.alpha.estimate_alpha_cf import estimate_alpha_cf
+    from pymatting.foreground.estimate_foreground_ml import estimate_foreground_ml
+    
+    image = image / 255.0
     try:
-        # Crear sesión con el modelo específico
-        session = new_session(model)
+        alpha = estimate_alpha_cf(image, trimap / 255.0)
+    except Exception:
+        alpha = mask / 255.0
+    alpha = np.clip(alpha, 0, 1)
+    return alpha, estimate_foreground_ml(image, alpha)
+
+
+def edge_alpha_matting_cutout(image, mask, tile_size=EDGE_MATTING_TILE, margin=EDGE_MATTING_MARGIN, workers=None):
+    """
+    Alpha matting resuelto solo en la franja dudosa del borde.
+    
+    Usa el mismo trimap que rembg, pero en lugar de resolver el sistema de
+    toda la imagen divide la franja dudosa (128 en el trimap) en teselas de
+    tile_size píxeles y resuelve cada una con margin píxeles de contexto. Las
+    teselas sin píxeles dudosos no se procesan, así que el coste crece con la
+    longitud del borde y no con los megapíxeles. Si el recorte de una tesela
+    no contiene primer plano y fondo conocidos, el contexto se amplía hasta
+    que los tenga. Fuera de la franja el alfa es 0 o 255 y el color es el
+    original.
+    
+    Args:
+        image (PIL.Image): Imagen original
+        mask (PIL.Image): Máscara del modelo (modo L, mismo tamaño)
+        tile_size (int): Lado de cada tesela en píxeles
+        margin (int): Contexto alrededor de cada tesela en píxeles
+        workers (int): Hilos para resolver teselas en paralelo (por defecto:
+                       OMP_NUM_THREADS o los núcleos disponibles; 1 = en serie)
+    
+    Returns:
+        PIL.Image: Imagen RGBA con el fondo eliminado
+    """
+    import numpy as np
+    from PIL import Image
+    
+    rgb = np.asarray(image.convert('RGB'))
+    mask_array = np.asarray(mask)
+    trimap = _matting_trimap(mask_array)
+    unknown = trimap == 128
+    
+    # Resultado en uint8 desde el principio: solo los recortes se resuelven en coma flotante
+    alpha = trimap.copy()
+    foreground = rgb.copy()
+    
+    height, width = trimap.shape
+    tiles = []
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            bottom, right = min(top + tile_size, height), min(left + tile_size, width)
+            if unknown[top:bottom, left:right].any():
+                tiles.append((top, left, bottom, right))
+    
+    def crop_for(tile):
+        # El sistema necesita primer plano y fondo conocidos: se amplía el contexto hasta tenerlos
+        top, left, bottom, right = tile
+        context = margin
+        while True:
+            crop = (slice(max(top - context, 0), min(bottom + context, height)),
+                    slice(max(left - context, 0), min(right + context, width)))
+            known = trimap[crop]
+            whole = crop[0].stop - crop[0].start == height and crop[1].stop - crop[1].start == width
+            if whole or ((known == 0).any() and (known == 255).any()):
+                return crop
+            context *= 2
+    
+    def solve(tile):
+        crop = crop_for(tile)
+        alpha, foreground = _solve_matting_tile(rgb[crop], trimap[crop], mask_array[crop])
+        return crop, alpha, foreground
+    
+    if workers is None:
+        workers = int(os.environ.get('OMP_NUM_THREADS', 0)) or os.cpu_count() or 1
+    
+    if workers > 1 and len(tiles) > 1:
+        # pymatting libera el GIL en sus partes costosas, así que bastan hilos
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(workers, len(tiles))) as executor:
+            solved = list(executor.map(solve, tiles))
+    else:
+        solved = [solve(tile) for tile in tiles]
+    
+    # Cada tesela aporta solo sus píxeles dudosos, sin el margen de contexto
+    for (top, left, bottom, right), (crop, tile_alpha, tile_foreground) in zip(tiles, solved):
+        y, x = top - crop[0].start, left - crop[1].start
+        inner = (slice(y, y + bottom - top), slice(x, x + right - left))
+        band = unknown[top:bottom, left:right]
+        alpha[top:bottom, left:right][band] = np.clip(tile_alpha[inner][band] * 255, 0, 255)
+        foreground[top:bottom, left:right][band] = np.clip(tile_foreground[inner][band] * 255, 0, 255)
+    
+    return Image.fromarray(np.dstack([foreground, alpha]), mode='RGBA')
+
+
+def remove_background_large(input_data, max_side, model='birefnet-general', alpha_matting=False,
+                            session=None, only_mask=False):
+    """
+    Elimina el fondo de una imagen grande calculando la máscara a resolución reducida.
+    
+    La imagen se decodifica una sola vez; la máscara (y el alpha matting, si se
+    pide) se calcula sobre una copia cuyo lado mayor no supera max_side y luego
+    se reescala con un filtro guiado y se aplica al original. Así la memoria y
+    el tiempo de inferencia no crecen con los megapíxeles de la entrada.
+    
+    Args:
+        input_data (bytes): Contenido de la imagen
+        max_side (int): Lado mayor máximo de la copia usada para la inferencia
+        model (str): Modelo a usar
+        alpha_matting (bool o str): Usar alpha matting (a resolución reducida);
+                                    'edge' lo limita al borde (ver edge_alpha_matting_cutout)
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        only_mask (bool): Devolver solo la máscara (modo L) en lugar de la imagen RGBA
+    
+    Returns:
+        PIL.Image: Imagen RGBA (o máscara) a la resolución original
+    """
+    from rembg import remove
+    from PIL import Image, ImageOps
+    
+    if session is None:
+        session = create_session(model)
+    
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(input_data)))
+    image = image.convert('RGB')
+    
+    small = image.copy()
+    small.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    
+    if alpha_matting == 'edge':
+        mask_small = remove(small, session=session, only_mask=True)
+        mask_small = edge_alpha_matting_cutout(small, mask_small).getchannel('A')
+    elif alpha_matting:
+        mask_small = remove(small, session=session, alpha_matting=True, **ALPHA_MATTING_PARAMS)
+        mask_small = mask_small.getchannel('A')
+    else:
+        mask_small = remove(small, session=session, only_mask=True)
+    
+    if small.size == image.size:
+        mask = mask_small
+    else:
+        mask = _guided_upsample_mask(mask_small, small.convert('L'), image.convert('L'))
+    
+    if only_mask:
+        return mask
+    image.putalpha(mask)
+    return image
+
+
+# Resultados guardados entre dos recuentos completos del directorio de la caché
+CACHE_RESCAN_PUTS = 256
+
+# Al expulsar se baja hasta esta fracción del tamaño máximo, para no volver a
+# recorrer el directorio en el siguiente put
+CACHE_LOW_WATER = 0.9
+
+
+class ResultCache:
+    """
+    Caché en disco de resultados, direccionada por contenido y con expulsión LRU.
+    
+    Cada resultado se guarda como <clave>.png, donde la clave es el SHA-256 de
+    la imagen de entrada junto con el modelo y los parámetros de procesamiento.
+    La fecha de modificación de cada archivo se actualiza en cada acierto, así
+    que al superar el tamaño máximo se eliminan primero los menos usados.
+    
+    El tamaño total se lleva en memoria y se actualiza en cada put; el
+    directorio solo se recorre en el primer put, al superar el máximo y cada
+    CACHE_RESCAN_PUTS resultados (para contar lo que escriben otros procesos).
+    """
+    
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directorio de la caché (se crea si no existe)
+            max_bytes (int): Tamaño máximo total de la caché en bytes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None
+        self._puts = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(input_data, model, alpha_matting, **options):
+        """Calcula la clave de caché de una imagen y sus parámetros."""
+        params = {'model': model, 'alpha_matting': alpha_matting}
+        if alpha_matting:
+            params.update(ALPHA_MATTING_PARAMS)
+        params.update(options)
+        
+        digest = hashlib.sha256(input_data)
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return self.cache_dir / f"{key}.png"
+    
+    def get(self, key):
+        """Devuelve los bytes guardados para la clave o None si no existen."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        # Marcar como usado recientemente para la expulsión LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+    
+    def put(self, key, data):
+        """Guarda un resultado y expulsa los más antiguos si se supera el tamaño máximo."""
+        path = self._path(key)
+        try:
+            previous_size = path.stat().st_size
+        except OSError:
+            previous_size = 0
+        
+        # Escritura atómica para no dejar archivos a medias si varios procesos comparten la caché
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            self._puts += 1
+            if self._bytes is None or self._puts % CACHE_RESCAN_PUTS == 0:
+                rescan = True
+            else:
+                self._bytes += len(data) - previous_size
+                rescan = self._bytes > self.max_bytes
+        if rescan:
+            self.evict()
+    
+    def evict(self):
+        """
+        Recorre el directorio, actualiza el tamaño total y, si supera el máximo,
+        elimina las entradas usadas hace más tiempo hasta bajar de CACHE_LOW_WATER.
+        """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*.png'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes * CACHE_LOW_WATER:
+                    break
+        
+        with self._lock:
+            self._bytes = total
+
+
+def remove_background_image(input_data, model='birefnet-general', alpha_matting=False, session=None,
+                            max_side=None, only_mask=False):
+    """
+    Elimina el fondo de una imagen y devuelve el resultado sin codificar.
+    
+    Args:
+        input_data (bytes): Contenido de la imagen (cualquier formato soportado por Pillow)
+        model (str): Modelo a usar
+        alpha_matting (bool o str): Usar alpha matting para bordes más suaves;
+                                    'edge' lo limita al borde (ver edge_alpha_matting_cutout)
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        max_side (int): Calcular la máscara con el lado mayor limitado a este valor
+                        (opcional, ver remove_background_large)
+        only_mask (bool): Devolver solo la máscara (modo L)
+    
+    Returns:
+        PIL.Image: Imagen RGBA con transparencia (o máscara en modo L)
+    """
+    from rembg import remove
+    from rembg.bg import fix_image_orientation
+    from PIL import Image
+    
+    try:
+        # Crear sesión con el modelo específico solo si no se proporcionó una
+        if session is None:
+            session = create_session(model)
+        
+        if max_side:
+            return remove_background_large(input_data, max_side, model, alpha_matting, session, only_mask)
+        
+        # Pasar una imagen de Pillow hace que rembg devuelva otra sin codificarla a PNG
+        image = Image.open(io.BytesIO(input_data))
+        
+        if alpha_matting == 'edge':
+            # Orientar antes para que la máscara de rembg coincida con la imagen
+            image = fix_image_orientation(image)
+            mask = remove(image, session=session, only_mask=True)
+            output_image = edge_alpha_matting_cutout(image, mask)
+            return output_image.getchannel('A') if only_mask else output_image
         
         # Usar la API con sesión personalizada
         if alpha_matting:
-            output_data = remove(
-                input_data,
+            # rembg ignora el alpha matting con only_mask, así que se extrae el canal alfa
+            output_image = remove(
+                image,
                 session=session,
                 alpha_matting=True,
-                alpha_matting_foreground_threshold=240,
-                alpha_matting_background_threshold=10,
-                alpha_matting_erode_size=10
+                **ALPHA_MATTING_PARAMS
             )
-        else:
-            output_data = remove(input_data, session=session)
+            return output_image.getchannel('A') if only_mask else output_image
+        return remove(image, session=session, only_mask=only_mask)
     except Exception as e:
         raise ValueError(f"Error al procesar la imagen: {e}")
+
+
+def encode_image(image, output_format='png', compress_level=6, quality=90):
+    """
+    Codifica el resultado en el formato de salida elegido.
     
-    # Guardar resultado
-    try:
-        output_image = Image.open(io.BytesIO(output_data))
-        output_image.save(output_path, format='PNG', optimize=True)
-    except Exception as e:
-        raise ValueError(f"Error al guardar la imagen: {e}")
+    Args:
+        image (PIL.Image): Imagen RGBA o máscara en modo L
+        output_format (str): 'png', 'webp' o 'mask'
+        compress_level (int): Nivel zlib para PNG (0 = sin compresión, 9 = máximo)
+        quality (int): Calidad WebP (100 = sin pérdida)
     
-    return str(output_path)
+    Returns:
+        bytes: Imagen codificada
+    """
+    buffer = io.BytesIO()
+    if output_format == 'webp':
+        image.save(buffer, format='WEBP', quality=quality, lossless=quality >= 100)
+    else:
+        image.save(buffer, format='PNG', compress_level=compress_level)
+    return buffer.getvalue()
 
 
-def main():
-    """Función principal para ejecutar desde línea de comandos."""
-    parser = argparse.ArgumentParser(
-        description='Elimina el fondo de imágenes usando IA',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Modelos disponibles:
-  birefnet-general      - Modelo BiRefNet de alta calidad (por defecto, RECOMENDADO)
-  birefnet-portrait     - BiRefNet optimizado para retratos/personas
-  isnet-general-use     - Modelo IS-Net mejorado
-  u2net                 - Modelo U2Net clásico (más rápido, menor calidad)
+def _cache_key(input_data, model, alpha_matting, session, max_side, output_format, compress_level, quality):
+    """Clave de caché de una imagen con las opciones que afectan al resultado."""
+    options = {'output_format': output_format, 'compress_level': compress_level, 'quality': quality}
+    if max_side:
+        options['max_side'] = max_side
+    # La variante int8 da máscaras algo distintas: no debe compartir entradas con la fp32
+    if getattr(session, 'quantized', False):
+        options['quantized'] = True
+    return ResultCache.make_key(input_data, model, alpha_matting, **options)
 
-Ejemplos de uso:
-  %(prog)s foto.jpg
-  %(prog)s foto.jpg -o resultado.png
-  %(prog)s foto.jpg -m birefnet-portrait  # mejor para personas
-  %(prog)s foto.jpg -a  # con alpha matting para bordes suaves
-  %(prog)s foto.jpg -m isnet-general-use -o output/sin_fondo.png
-        """
-    )
+
+def remove_background_bytes(input_data, model='birefnet-general', alpha_matting=False, session=None,
+                            cache=None, max_side=None, output_format='png', compress_level=6, quality=90):
+    """
+    Elimina el fondo de una imagen ya cargada en memoria.
     
-    parser.add_argument(
-        'input',
-        help='Ruta de la imagen de entrada'
-    )
+    Args:
+        input_data (bytes): Contenido de la imagen (cualquier formato soportado por Pillow)
+        model (str): Modelo a usar
+        alpha_matting (bool): Usar alpha matting para bordes más suaves
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        cache (ResultCache): Caché de resultados (opcional)
+        max_side (int): Calcular la máscara con el lado mayor limitado a este valor
+                        (opcional, ver remove_background_large)
+        output_format (str): 'png', 'webp' o 'mask' (solo la máscara en PNG)
+        compress_level (int): Nivel zlib para PNG (0-9)
+        quality (int): Calidad WebP (100 = sin pérdida)
     
-    parser.add_argument(
-        '-o', '--output',
-        help='Ruta de la imagen de salida (por defecto: [nombre]_no_bg.png)',
-        default=None
-    )
+    Returns:
+        bytes: Imagen codificada en el formato pedido
+    """
+    # Con caché, un acierto evita cargar el modelo y ejecutar la inferencia
+    if cache is not None:
+        key = _cache_key(input_data, model, alpha_matting, session, max_side, output_format, compress_level,
+                         quality)
+        output_data = cache.get(key)
+        if output_data is not None:
+            return output_data
+        output_data = remove_background_bytes(
+            input_data, model, alpha_matting, session,
+            max_side=max_side,
+            output_format=output_format,
+            compress_level=compress_level,
+            quality=quality
+        )
+        try:
+            cache.put(key, output_data)
+        except OSError as e:
+            print(f"   ⚠️  No se pudo guardar en caché: {e}", file=sys.stderr)
+        return output_data
     
-    parser.add_argument(
-        '-m', '--model',
-        help='Modelo a usar (por defecto: birefnet-general)',
-        choices=['birefnet-general', 'birefnet-portrait', 'isnet-general-use', 'u2net'],
-        default='birefnet-general'
+    output_image = remove_background_image(
+        input_data,
+        model=model,
+        alpha_matting=alpha_matting,
+        session=session,
+        max_side=max_side,
+        only_mask=output_format == 'mask'
+    )
+    
+    # Única codificación del resultado, directamente en el formato final
+    try:
+        return encode_image(output_image, output_format, compress_level=compress_level, quality=quality)
+    except Exception as e:
+        raise ValueError(f"Error al codificar la imagen: {e}")
+
+
+# Modelos de los que ya se avisó de que su lote fijo ignora batch_size (una vez por proceso)
+_fixed_batch_warned = set()
+
+
+def effective_batch_size(session, model, batch_size):
+    """
+    Devuelve las imágenes por pasada que usará predict_masks() con esta sesión.
+    
+    Los modelos sin entrada conocida (ver MODEL_INPUTS) se ejecutan imagen a
+    imagen y los exportados con un tamaño de lote fijo usan ese tamaño.
+    """
+    if model not in MODEL_INPUTS:
+        return 1
+    batch_dim = session.inner_session.get_inputs()[0].shape[0]
+    return batch_dim if isinstance(batch_dim, int) else batch_size
+
+
+def predict_masks(images, session, model, batch_size=BATCH_SIZE):
+    """
+    Calcula las máscaras de varias imágenes con una pasada del modelo por grupo.
+    
+    Cada imagen se preprocesa como en rembg (redimensionada a la entrada del
+    modelo y normalizada), las de un mismo grupo se apilan en un único tensor
+    y la salida se separa y se devuelve al tamaño de cada imagen. Los modelos
+    exportados con un tamaño de lote fijo usan ese tamaño, y si es menor que
+    batch_size se avisa una vez por proceso.
+    
+    Args:
+        images (list): Imágenes de Pillow
+        session: Sesión de rembg del modelo
+        model (str): Modelo de la sesión (ver MODEL_INPUTS)
+        batch_size (int): Imágenes por pasada del modelo
+    
+    Returns:
+        list: Máscaras en modo L, en el mismo orden que las imágenes
+    """
+    import numpy as np
+    from PIL import Image
+    
+    effective = effective_batch_size(session, model, batch_size)
+    if effective < batch_size and len(images) > effective and model not in _fixed_batch_warned:
+        _fixed_batch_warned.add(model)
+        print(f"⚠️  El modelo '{model}' se exportó con un lote fijo de {effective}: "
+              f"se procesarán {effective} imagen(es) por pasada en lugar de {batch_size}", file=sys.stderr)
+    batch_size = effective
+    
+    if model not in MODEL_INPUTS:
+        return [session.predict(image)[0] for image in images]
+    
+    mean, std, size, logits = MODEL_INPUTS[model]
+    model_input = session.inner_session.get_inputs()[0]
+    
+    masks = []
+    for start in range(0, len(images), batch_size):
+        group = images[start:start + batch_size]
+        tensor = np.concatenate([session.normalize(image, mean, std, size)[model_input.name] for image in group])
+        preds = session.inner_session.run(None, {model_input.name: tensor})[0][:, 0, :, :]
+        if logits:
+            preds = 1 / (1 + np.exp(-preds))
+        
+        for image, pred in zip(group, preds):
+            # Normalización por imagen, como la de rembg con lotes de una
+            pred = (pred - pred.min()) / max(pred.max() - pred.min(), 1e-6)
+            mask = Image.fromarray((pred.clip(0, 1) * 255).astype(np.uint8), mode='L')
+            masks.append(mask.resize(image.size, Image.Resampling.LANCZOS))
+    return masks
+
+
+def _cutout(image, mask, alpha_matting=False):
+    """
+    Recorta una imagen con su máscara como rembg.remove(): con alpha matting
+    se estiman también los colores del primer plano para evitar halos.
+    """
+    from rembg.bg import alpha_matting_cutout, decontaminate_cutout, naive_cutout
+    
+    if not alpha_matting:
+        return naive_cutout(image, mask)
+    if alpha_matting == 'edge':
+        return edge_alpha_matting_cutout(image, mask)
+    try:
+        return alpha_matting_cutout(
+            image,
+            mask,
+            ALPHA_MATTING_PARAMS['alpha_matting_foreground_threshold'],
+            ALPHA_MATTING_PARAMS['alpha_matting_background_threshold'],
+            ALPHA_MATTING_PARAMS['alpha_matting_erode_size']
+        )
+    except ValueError:
+        return decontaminate_cutout(image, mask)
+
+
+def remove_background_images(images, model='birefnet-general', alpha_matting=False, session=None,
+                             max_side=None, only_mask=False, batch_size=BATCH_SIZE):
+    """
+    Elimina el fondo de varias imágenes agrupando la inferencia en lotes.
+    
+    Equivale a llamar a remove_background_image() con cada imagen, pero el
+    modelo se ejecuta una vez por cada grupo de batch_size imágenes (ver
+    predict_masks). El recorte y el alpha matting se hacen imagen a imagen.
+    
+    Args:
+        images (list): Imágenes de Pillow ya decodificadas
+        model (str): Modelo a usar
+        alpha_matting (bool o str): Usar alpha matting para bordes más suaves ('edge': solo el borde)
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        max_side (int): Calcular la máscara con el lado mayor limitado a este valor (opcional)
+        only_mask (bool): Devolver solo las máscaras (modo L)
+        batch_size (int): Imágenes por pasada del modelo
+    
+    Returns:
+        list: Imágenes RGBA (o máscaras), en el mismo orden que las entradas
+    """
+    from rembg.bg import fix_image_orientation
+    from PIL import Image, ImageOps
+    
+    if session is None:
+        session = create_session(model)
+    
+    if not max_side:
+        images = [fix_image_orientation(image) for image in images]
+        masks = predict_masks(images, session, model, batch_size)
+        if only_mask and not alpha_matting:
+            return masks
+        outputs = [_cutout(image, mask, alpha_matting) for image, mask in zip(images, masks)]
+        return [output.getchannel('A') for output in outputs] if only_mask else outputs
+    
+    # Como remove_background_large(): máscara sobre una copia reducida y filtro guiado
+    images = [ImageOps.exif_transpose(image).convert('RGB') for image in images]
+    smalls = []
+    for image in images:
+        small = image.copy()
+        small.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        smalls.append(small)
+    
+    outputs = []
+    for image, small, mask_small in zip(images, smalls, predict_masks(smalls, session, model, batch_size)):
+        if alpha_matting:
+            mask_small = _cutout(small, mask_small, alpha_matting).getchannel('A')
+        if small.size == image.size:
+            mask = mask_small
+        else:
+            mask = _guided_upsample_mask(mask_small, small.convert('L'), image.convert('L'))
+        
+        if only_mask:
+            outputs.append(mask)
+        else:
+            image.putalpha(mask)
+            outputs.append(image)
+    return outputs
+
+
+def remove_background_bytes_batch(input_data_list, model='birefnet-general', alpha_matting=False, session=None,
+                                  cache=None, max_side=None, output_format='png', compress_level=6,
+                                  quality=90, batch_size=BATCH_SIZE):
+    """
+    Versión por lotes de remove_background_bytes().
+    
+    Un error en una imagen (por ejemplo, un archivo que no es una imagen) no
+    impide procesar las demás: su posición en el resultado contiene la
+    excepción en lugar de los bytes.
+    
+    Args:
+        input_data_list (list): Contenido de cada imagen
+        batch_size (int): Imágenes por pasada del modelo
+        (el resto, como en remove_background_bytes)
+    
+    Returns:
+        list: Bytes codificados o excepción de cada imagen, en el mismo orden
+    """
+    from PIL import Image
+    
+    results = [None] * len(input_data_list)
+    keys = {}
+    pending = []
+    for position, input_data in enumerate(input_data_list):
+        if cache is not None:
+            keys[position] = _cache_key(input_data, model, alpha_matting, session, max_side, output_format,
+                                        compress_level, quality)
+            results[position] = cache.get(keys[position])
+            if results[position] is not None:
+                continue
+        try:
+            image = Image.open(io.BytesIO(input_data))
+            image.load()
+        except Exception as e:
+            results[position] = ValueError(f"Error al procesar la imagen: {e}")
+            continue
+        pending.append((position, image))
+    
+    if not pending:
+        return results
+    
+    try:
+        outputs = remove_background_images(
+            [image for _, image in pending],
+            model=model,
+            alpha_matting=alpha_matting,
+            session=session,
+            max_side=max_side,
+            only_mask=output_format == 'mask',
+            batch_size=batch_size
+        )
+    except Exception as e:
+        for position, _ in pending:
+            results[position] = ValueError(f"Error al procesar la imagen: {e}")
+        return results
+    
+    for (position, _), output_image in zip(pending, outputs):
+        try:
+            results[position] = encode_image(output_image, output_format, compress_level=compress_level,
+                                              quality=quality)
+        except Exception as e:
+            results[position] = ValueError(f"Error al codificar la imagen: {e}")
+            continue
+        if cache is not None:
+            try:
+                cache.put(keys[position], results[position])
+            except OSError as e:
+                print(f"   ⚠️  No se pudo guardar en caché: {e}", file=sys.stderr)
+    return results
+
+
+def remove_background(input_path, output_path=None, model='birefnet-general', alpha_matting=False,
+                      session=None, cache=None, max_side=None, output_format='png', compress_level=6,
+                      quality=90):
+    """
+    Elimina el fondo de una imagen.
+    
+    Args:
+        input_path (str): Ruta de la imagen de entrada
+        output_path (str): Ruta de la imagen de salida (opcional)
+        model (str): Modelo a usar ('birefnet-general', 'birefnet-portrait', 'isnet-general-use', 'u2net')
+        alpha_matting (bool o str): Usar alpha matting para bordes más suaves; 'edge' lo
+                                    resuelve solo en la franja del borde (mucho más rápido)
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        cache (ResultCache): Caché de resultados (opcional)
+        max_side (int): Calcular la máscara con el lado mayor limitado a este valor (opcional)
+        output_format (str): 'png', 'webp' o 'mask' (solo la máscara en PNG)
+        compress_level (int): Nivel zlib para PNG (0-9)
+        quality (int): Calidad WebP (100 = sin pérdida)
+    
+    Returns:
+        str: Ruta del archivo generado
+    """
+    input_path = Path(input_path)
+    
+    # Verificar que el archivo existe
+    if not input_path.exists():
+        raise FileNotFoundError(f"El archivo {input_path} no existe")
+    
+    # Determinar ruta de salida
+    if output_path is None:
+        output_path = input_path.parent / f"{input_path.stem}{OUTPUT_FORMATS[output_format]['suffix']}"
+    else:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Cargar imagen
+    try:
+        with open(input_path, 'rb') as f:
+            input_data = f.read()
+    except Exception as e:
+        raise ValueError(f"Error al leer la imagen: {e}")
+    
+    print(f"🔄 Procesando imagen con modelo '{model}'...")
+    if alpha_matting == 'edge':
+        print("   (usando alpha matting en la franja del borde)")
+    elif alpha_matting:
+        print("   (usando alpha matting para bordes suaves)")
+    
+    # Eliminar fondo usando el modelo especificado
+    output_data = remove_background_bytes(
+        input_data,
+        model=model,
+        alpha_matting=alpha_matting,
+        session=session,
+        cache=cache,
+        max_side=max_side,
+        output_format=output_format,
+        compress_level=compress_level,
+        quality=quality
+    )
+    
+    # Guardar resultado (ya codificado, sin volver a decodificarlo)
+    try:
+        output_path.write_bytes(output_data)
+    except Exception as e:
+        raise ValueError(f"Error al guardar la imagen: {e}")
+    
+    return str(output_path)
+
+
+def expand_inputs(inputs):
+    """
+    Expande una lista de rutas, patrones glob y directorios a archivos de imagen.
+    
+    Args:
+        inputs (list): Rutas de archivos, directorios o patrones glob
+    
+    Returns:
+        list: Lista de rutas (Path) sin duplicados, en el orden recibido
+    """
+    files = []
+    seen = set()
+    
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            # Todas las imágenes del directorio, ordenadas por nombre
+            candidates = sorted(
+                p for p in path.iterdir()
+                if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+            )
+        elif glob.has_magic(item):
+            candidates = sorted(Path(p) for p in glob.glob(item, recursive=True) if Path(p).is_file())
+        else:
+            # Ruta directa: se deja que remove_background() informe si no existe
+            candidates = [path]
+        
+        for candidate in candidates:
+            key = candidate.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(candidate)
+    
+    return files
+
+
+# Sesión y caché de cada proceso del pool (se crean una vez en _init_worker)
+_worker_session = None
+_worker_cache = None
+
+
+def _init_worker(model, threads_per_worker, cache_dir=None, cache_max_bytes=None, runtime=None):
+    """
+    Inicializa un proceso del pool cargando el modelo una sola vez.
+    
+    Args:
+        model (str): Modelo a cargar
+        threads_per_worker (int): Hilos de ONNX Runtime para este proceso
+        cache_dir (str): Directorio de la caché de resultados (opcional)
+        cache_max_bytes (int): Tamaño máximo de la caché en bytes
+        runtime (dict): Opciones de create_session() (opcional)
+    """
+    global _worker_session, _worker_cache
+    
+    if cache_dir is not None:
+        _worker_cache = ResultCache(cache_dir, max_bytes=cache_max_bytes)
+    # rembg lee OMP_NUM_THREADS al crear la sesión; repartir los núcleos
+    # entre procesos evita que compitan entre sí por la CPU
+    os.environ['OMP_NUM_THREADS'] = str(threads_per_worker)
+    _worker_session = create_session(model, **(runtime or {}))
+
+
+def _process_image(input_path, output_path, model, alpha_matting, session, cache=None, **options):
+    """
+    Procesa una imagen del lote y mide su tiempo.
+    
+    Las opciones adicionales (max_side, output_format, ...) se pasan a remove_background().
+    
+    Returns:
+        dict: Resultado con 'input', 'output', 'seconds', 'error' y 'cache_hit'
+              (None si no se usa caché)
+    """
+    hits_before = cache.hits if cache is not None else 0
+    start = time.perf_counter()
+    try:
+        output_file = remove_background(
+            input_path,
+            output_path=output_path,
+            model=model,
+            alpha_matting=alpha_matting,
+            session=session,
+            cache=cache,
+            **options
+        )
+        error = None
+    except Exception as e:
+        output_file = None
+        error = str(e)
+    
+    return {
+        'input': str(input_path),
+        'output': output_file,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+        'cache_hit': cache.hits > hits_before if cache is not None else None
+    }
+
+
+def _process_image_in_worker(input_path, output_path, model, alpha_matting, options):
+    """Procesa una imagen dentro de un proceso del pool usando su sesión."""
+    return _process_image(input_path, output_path, model, alpha_matting, _worker_session, _worker_cache,
+                          **options)
+
+
+def _process_images(jobs, model, alpha_matting, session, cache=None, **options):
+    """
+    Procesa un grupo de imágenes del lote con una sola pasada del modelo.
+    
+    El tiempo del grupo se reparte a partes iguales entre sus imágenes.
+    
+    Args:
+        jobs (list): Pares (ruta de entrada, ruta de salida o None)
+    
+    Returns:
+        list: Un resultado por imagen, como los de _process_image()
+    """
+    suffix = OUTPUT_FORMATS[options.get('output_format', 'png')]['suffix']
+    start = time.perf_counter()
+    
+    results = []
+    pending = []
+    for input_path, output_path in jobs:
+        input_path = Path(input_path)
+        output_path = Path(output_path) if output_path is not None else (
+            input_path.parent / f"{input_path.stem}{suffix}"
+        )
+        result = {'input': str(input_path), 'output': None, 'seconds': 0.0, 'error': None,
+                  'cache_hit': None}
+        results.append(result)
+        try:
+            input_data = input_path.read_bytes()
+        except FileNotFoundError:
+            result['error'] = f"El archivo {input_path} no existe"
+            continue
+        except Exception as e:
+            result['error'] = f"Error al leer la imagen: {e}"
+            continue
+        pending.append((result, input_data, output_path))
+    
+    # Los aciertos de caché se resuelven aquí para poder marcarlos en cada resultado
+    misses = []
+    for result, input_data, output_path in pending:
+        if cache is not None:
+            key = _cache_key(input_data, model, alpha_matting, session, options.get('max_side'),
+                             options.get('output_format', 'png'), options.get('compress_level', 6),
+                             options.get('quality', 90))
+            output_data = cache.get(key)
+            result['cache_hit'] = output_data is not None
+            if output_data is not None:
+                result['output_data'] = output_data
+                continue
+            result['cache_key'] = key
+        misses.append((result, input_data))
+    
+    outputs = remove_background_bytes_batch(
+        [input_data for _, input_data in misses],
+        model=model,
+        alpha_matting=alpha_matting,
+        session=session,
+        batch_size=len(misses) or 1,
+        **options
+    )
+    for (result, _), output_data in zip(misses, outputs):
+        if isinstance(output_data, Exception):
+            result['error'] = str(output_data)
+            continue
+        result['output_data'] = output_data
+        if cache is not None:
+            try:
+                cache.put(result['cache_key'], output_data)
+            except OSError as e:
+                print(f"   ⚠️  No se pudo guardar en caché: {e}", file=sys.stderr)
+    
+    for result, _, output_path in pending:
+        result.pop('cache_key', None)
+        output_data = result.pop('output_data', None)
+        if output_data is None:
+            continue
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_bytes(output_data)
+            result['output'] = str(output_path)
+        except Exception as e:
+            result['error'] = f"Error al guardar la imagen: {e}"
+    
+    seconds = (time.perf_counter() - start) / len(results)
+    for result in results:
+        result['seconds'] = seconds
+    return results
+
+
+def _process_images_in_worker(jobs, model, alpha_matting, options):
+    """Procesa un grupo de imágenes dentro de un proceso del pool usando su sesión."""
+    return _process_images(jobs, model, alpha_matting, _worker_session, _worker_cache, **options)
+
+
+def _print_result(index, total, result):
+    """Muestra el resultado de una imagen del lote."""
+    print(f"[{index}/{total}] {result['input']}")
+    if result['error'] is None:
+        cached = " [caché]" if result.get('cache_hit') else ""
+        print(f"   ✓ {Path(result['output']).name} ({result['seconds']:.2f} s){cached}")
+    else:
+        print(f"   ✗ Error: {result['error']}", file=sys.stderr)
+
+
+def unique_output_paths(files, output_dir, suffix):
+    """
+    Asigna a cada imagen una ruta de salida que no coincida con la de otra.
+    
+    Por defecto la salida es <nombre><sufijo> en output_dir (o junto a la
+    imagen). Las imágenes que coincidirían (x.jpg y x.png, o a/x.jpg y b/x.jpg
+    con un mismo output_dir) usan <nombre>_<extensión> y, si aún coinciden,
+    un contador (<nombre>_<extensión>_2).
+    
+    Args:
+        files (list): Rutas (Path) de las imágenes
+        output_dir (Path): Directorio de salida (None = junto a cada imagen)
+        suffix (str): Sufijo del formato de salida
+    
+    Returns:
+        list: Rutas de salida, en el mismo orden que files
+    """
+    def target(path, name):
+        return (output_dir if output_dir is not None else path.parent) / f"{name}{suffix}"
+    
+    counts = {}
+    for path in files:
+        key = target(path, path.stem).resolve()
+        counts[key] = counts.get(key, 0) + 1
+    taken = {key for key, count in counts.items() if count == 1}
+    
+    outputs = []
+    for path in files:
+        output_path = target(path, path.stem)
+        if counts[output_path.resolve()] > 1:
+            name = f"{path.stem}_{path.suffix[1:].lower()}"
+            output_path = target(path, name)
+            number = 2
+            while output_path.resolve() in taken:
+                output_path = target(path, f"{name}_{number}")
+                number += 1
+            taken.add(output_path.resolve())
+        outputs.append(output_path)
+    return outputs
+
+
+def remove_background_batch(inputs, output_dir=None, model='birefnet-general', alpha_matting=False,
+                            workers=1, cache=None, runtime=None, batch_size=1, **options):
+    """
+    Elimina el fondo de varias imágenes reutilizando una única sesión del modelo.
+    
+    Con workers > 1 se usa un pool de procesos: cada proceso carga el modelo
+    una vez al arrancar y va tomando imágenes de la cola compartida. Con
+    batch_size > 1 las imágenes se reparten en grupos que se procesan con una
+    sola pasada del modelo (ver predict_masks).
+    
+    Args:
+        inputs (list): Rutas de archivos, directorios o patrones glob
+        output_dir (str): Directorio de salida (opcional, por defecto junto a cada imagen;
+                          los nombres que coincidirían se distinguen, ver unique_output_paths)
+        model (str): Modelo a usar
+        alpha_matting (bool): Usar alpha matting para bordes más suaves
+        workers (int): Número de procesos en paralelo (1 = secuencial)
+        cache (ResultCache): Caché de resultados (opcional, compartida entre procesos)
+        runtime (dict): Opciones de ONNX Runtime para create_session() (opcional)
+        batch_size (int): Imágenes por pasada del modelo (1 = una a una)
+        **options: Opciones para remove_background() (max_side, output_format,
+                   compress_level, quality)
+    
+    Returns:
+        list: Un diccionario por imagen con 'input', 'output', 'seconds', 'error'
+              y 'cache_hit', en el mismo orden que las entradas
+    """
+    files = expand_inputs(inputs)
+    if not files:
+        raise ValueError("No se encontraron imágenes para procesar")
+    
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Emparejar cada entrada con su ruta de salida; dos imágenes nunca comparten la misma
+    suffix = OUTPUT_FORMATS[options.get('output_format', 'png')]['suffix']
+    jobs = list(zip(files, unique_output_paths(files, output_dir, suffix)))
+    
+    workers = max(1, min(workers, len(jobs)))
+    
+    if workers == 1:
+        # Cargar el modelo una sola vez para todo el lote
+        print(f"🔄 Cargando modelo '{model}'...")
+        start = time.perf_counter()
+        session = create_session(model, **(runtime or {}))
+        print(f"   Modelo cargado en {time.perf_counter() - start:.2f} s\n")
+        
+        results = []
+        if batch_size > 1:
+            for start in range(0, len(jobs), batch_size):
+                for result in _process_images(jobs[start:start + batch_size], model, alpha_matting, session,
+                                              cache, **options):
+                    results.append(result)
+                    _print_result(len(results), len(jobs), result)
+            return results
+        
+        for index, (input_path, output_path) in enumerate(jobs, start=1):
+            result = _process_image(input_path, output_path, model, alpha_matting, session, cache, **options)
+            _print_result(index, len(jobs), result)
+            results.append(result)
+        return results
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🔄 Iniciando {workers} procesos con modelo '{model}' "
+          f"({threads_per_worker} hilo(s) cada uno)...\n")
+    
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            model,
+            threads_per_worker,
+            str(cache.cache_dir) if cache is not None else None,
+            cache.max_bytes if cache is not None else None,
+            runtime
+        )
+    ) as executor:
+        # Cada tarea es un grupo de posiciones: una imagen o batch_size imágenes
+        if batch_size > 1:
+            futures = {
+                executor.submit(
+                    _process_images_in_worker, jobs[start:start + batch_size], model, alpha_matting, options
+                ): range(start, min(start + batch_size, len(jobs)))
+                for start in range(0, len(jobs), batch_size)
+            }
+        else:
+            futures = {
+                executor.submit(
+                    _process_image_in_worker, input_path, output_path, model, alpha_matting, options
+                ): range(position, position + 1)
+                for position, (input_path, output_path) in enumerate(jobs)
+            }
+        
+        # Cada proceso escribe sus archivos al terminar; aquí solo se informa
+        done = 0
+        for future in as_completed(futures):
+            positions = futures[future]
+            try:
+                group = future.result()
+                if batch_size == 1:
+                    group = [group]
+            except Exception as e:
+                group = [
+                    {
+                        'input': str(jobs[position][0]),
+                        'output': None,
+                        'seconds': 0.0,
+                        'error': str(e),
+                        'cache_hit': None
+                    }
+                    for position in positions
+                ]
+            for position, result in zip(positions, group):
+                done += 1
+                _print_result(done, len(jobs), result)
+                results[position] = result
+    
+    return results
+
+
+def print_batch_summary(results, total_seconds):
+    """Muestra el resumen de tiempos y rendimiento de un lote."""
+    ok = [r for r in results if r['error'] is None]
+    failed = [r for r in results if r['error'] is not None]
+    
+    print("=" * 60)
+    print(f"✅ Procesadas: {len(ok)}/{len(results)} imágenes")
+    if failed:
+        print(f"❌ Fallidas: {len(failed)}")
+        for r in failed:
+            print(f"   - {r['input']}: {r['error']}")
+    
+    if ok:
+        times = [r['seconds'] for r in ok]
+        print(f"\n⏱️  Tiempo total: {total_seconds:.2f} s")
+        print(f"   Por imagen: media {sum(times) / len(times):.2f} s, "
+              f"mín {min(times):.2f} s, máx {max(times):.2f} s")
+        print(f"   Rendimiento: {len(ok) / total_seconds:.2f} imágenes/s")
+    
+    cached = [r for r in ok if r.get('cache_hit') is not None]
+    if cached:
+        hits = sum(1 for r in cached if r['cache_hit'])
+        print(f"\n💾 Caché: {hits} aciertos, {len(cached) - hits} fallos "
+              f"({hits / len(cached) * 100:.1f}% de aciertos)")
+
+
+# Modo secuencia: diferencia media máxima (0-255, sobre una miniatura en grises)
+# para reutilizar la máscara del fotograma anterior, fotogramas seguidos que
+# pueden reutilizarla y fotogramas en espera entre los hilos de lectura y escritura
+SEQUENCE_REUSE_THRESHOLD = 1.0
+SEQUENCE_MAX_REUSE = 5
+SEQUENCE_QUEUE_SIZE = 8
+
+
+def _frame_signature(image):
+    """Miniatura en grises de un fotograma para compararlo con el anterior."""
+    import numpy as np
+    from PIL import Image
+    
+    return np.asarray(image.convert('L').resize((64, 64), Image.Resampling.BILINEAR), dtype=np.float32)
+
+
+def remove_background_sequence(inputs, output_dir, model='birefnet-general', alpha_matting=False, session=None,
+                               reuse_threshold=SEQUENCE_REUSE_THRESHOLD, max_reuse=SEQUENCE_MAX_REUSE,
+                               max_side=None, output_format='png', compress_level=6, quality=90,
+                               encode_threads=2):
+    """
+    Elimina el fondo de una secuencia de fotogramas (por ejemplo, un vídeo exportado a imágenes).
+    
+    Los fotogramas se procesan en orden con una sola sesión: un hilo los va
+    decodificando por adelantado y otros los codifican y guardan, así que el
+    hilo principal solo ejecuta el modelo. Si un fotograma apenas cambia
+    respecto al último en el que se ejecutó el modelo (diferencia media de sus
+    miniaturas menor o igual que reuse_threshold), se reutiliza esa máscara;
+    tras max_reuse reutilizaciones seguidas se vuelve a ejecutar el modelo
+    para que los cambios lentos no se acumulen.
+    
+    Con alpha matting (sin max_side) se reutiliza la máscara del modelo y el
+    recorte se hace con cada fotograma en los hilos de escritura, igual que
+    remove_background_image(), para estimar los colores del primer plano de
+    ese fotograma. Los fotogramas cuyos nombres de salida coincidirían se
+    distinguen como en remove_background_batch() (ver unique_output_paths).
+    
+    Args:
+        inputs (list): Archivos, directorio o patrones glob de los fotogramas (en orden de nombre)
+        output_dir (str): Directorio de salida
+        model (str): Modelo a usar
+        alpha_matting (bool o str): Usar alpha matting ('edge': solo el borde)
+        session: Sesión de rembg ya creada (opcional, evita recargar el modelo)
+        reuse_threshold (float): Diferencia máxima para reutilizar la máscara (0 = nunca)
+        max_reuse (int): Fotogramas seguidos que pueden reutilizar una máscara
+        max_side (int): Calcular la máscara con el lado mayor limitado a este valor (opcional)
+        output_format (str): 'png', 'webp' o 'mask'
+        compress_level (int): Nivel zlib para PNG (0-9)
+        quality (int): Calidad WebP (100 = sin pérdida)
+        encode_threads (int): Hilos que codifican y guardan los resultados
+    
+    Returns:
+        dict: 'frames', 'inferred', 'reused', 'seconds' y 'fps'
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from collections import deque
+    from rembg.bg import fix_image_orientation, naive_cutout
+    from PIL import Image
+    
+    files = expand_inputs(inputs)
+    if not files:
+        raise ValueError("No se encontraron fotogramas para procesar")
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = OUTPUT_FORMATS[output_format]['suffix']
+    
+    # frame.png y frame.jpg (o fotogramas de varios directorios) no comparten salida
+    output_paths = dict(zip(files, unique_output_paths(files, output_dir, suffix)))
+    
+    # Sin max_side el alpha matting se aplica al guardar cada fotograma (ver arriba);
+    # con max_side la máscara ya sale refinada, como en remove_background_large()
+    matting_on_write = bool(alpha_matting) and not max_side
+    
+    if session is None:
+        session = create_session(model)
+    
+    # Lectura por adelantado en un hilo; None marca el final y una excepción, un error
+    frames = queue.Queue(maxsize=SEQUENCE_QUEUE_SIZE)
+    
+    def read_frames():
+        for path in files:
+            try:
+                image = fix_image_orientation(Image.open(path))
+                image.load()
+            except Exception as e:
+                frames.put(ValueError(f"Error al leer el fotograma {path}: {e}"))
+                return
+            frames.put((path, image))
+        frames.put(None)
+    
+    def write_frame(path, image, mask):
+        if matting_on_write:
+            output = _cutout(image, mask, alpha_matting)
+            if output_format == 'mask':
+                output = output.getchannel('A')
+        else:
+            output = mask if output_format == 'mask' else naive_cutout(image, mask)
+        data = encode_image(output, output_format, compress_level=compress_level, quality=quality)
+        output_paths[path].write_bytes(data)
+    
+    reader = threading.Thread(target=read_frames, daemon=True)
+    reader.start()
+    
+    stats = {'frames': 0, 'inferred': 0, 'reused': 0}
+    previous = None
+    reused_in_row = 0
+    pending = deque()
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, encode_threads)) as executor:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            path, image = item
+            
+            signature = _frame_signature(image)
+            reuse = (
+                reuse_threshold > 0
+                and previous is not None
+                and reused_in_row < max_reuse
+                and previous['size'] == image.size
+                and float(abs(signature - previous['signature']).mean()) <= reuse_threshold
+            )
+            
+            if reuse:
+                mask = previous['mask']
+                reused_in_row += 1
+                stats['reused'] += 1
+            else:
+                mask = remove_background_images(
+                    [image],
+                    model=model,
+                    alpha_matting=False if matting_on_write else alpha_matting,
+                    session=session,
+                    max_side=max_side,
+                    only_mask=True
+                )[0]
+                previous = {'signature': signature, 'size': image.size, 'mask': mask}
+                reused_in_row = 0
+                stats['inferred'] += 1
+            stats['frames'] += 1
+            
+            pending.append(executor.submit(write_frame, path, image, mask))
+            # Limitar los resultados en memoria a la espera de ser guardados
+            while len(pending) > SEQUENCE_QUEUE_SIZE:
+                pending.popleft().result()
+            
+            if stats['frames'] % 25 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"   {stats['frames']}/{len(files)} fotogramas ({stats['frames'] / elapsed:.1f} fps)")
+        
+        for future in pending:
+            future.result()
+    
+    stats['seconds'] = time.perf_counter() - start
+    stats['fps'] = stats['frames'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+class BackgroundRemovalService:
+    """
+    Servicio en memoria que mantiene cargadas las sesiones de varios modelos.
+    
+    Cada modelo tiene una cola acotada y un hilo que la atiende agrupando
+    peticiones en lotes que se procesan con una sola pasada del modelo (ver
+    remove_background_bytes_batch). Si la cola está llena la petición se
+    rechaza de inmediato (queue.Full) en lugar de esperar, para que la
+    latencia de las peticiones aceptadas se mantenga predecible.
+    """
+    
+    def __init__(self, models=None, queue_size=32, batch_size=4, batch_wait=0.01, cache=None,
+                 runtime=None, **options):
+        """
+        Args:
+            models (list): Modelos a mantener cargados (por defecto: todos)
+            queue_size (int): Peticiones en espera admitidas por modelo
+            batch_size (int): Peticiones máximas procesadas por lote
+            batch_wait (float): Segundos que se espera para completar un lote
+            cache (ResultCache): Caché de resultados (opcional)
+            runtime (dict): Opciones de ONNX Runtime para create_session() (opcional)
+            **options: Opciones por defecto para remove_background_bytes() (max_side,
+                       output_format, compress_level, quality)
+        """
+        self.models = list(models or MODELS)
+        self.cache = cache
+        self.options = options
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.sessions = {}
+        self.queues = {}
+        self.stats = {model: {'processed': 0, 'rejected': 0, 'batches': 0} for model in self.models}
+        self._lock = threading.Lock()
+        
+        for model in self.models:
+            print(f"🔄 Cargando modelo '{model}'...")
+            start = time.perf_counter()
+            self.sessions[model] = create_session(model, **(runtime or {}))
+            print(f"   Modelo cargado en {time.perf_counter() - start:.2f} s")
+            
+            self.queues[model] = queue.Queue(maxsize=queue_size)
+            thread = threading.Thread(target=self._worker, args=(model,), daemon=True)
+            thread.start()
+    
+    def submit(self, input_data, model='birefnet-general', alpha_matting=False, output_format=None):
+        """
+        Encola una imagen para procesar.
+        
+        Args:
+            output_format (str): Formato de salida (por defecto: el del servicio)
+        
+        Returns:
+            concurrent.futures.Future: Se resuelve con los bytes codificados del resultado
+        
+        Raises:
+            KeyError: Si el modelo no está cargado en el servicio
+            queue.Full: Si la cola del modelo está llena
+        """
+        from concurrent.futures import Future
+        
+        if model not in self.queues:
+            raise KeyError(model)
+        
+        options = dict(self.options)
+        if output_format is not None:
+            options['output_format'] = output_format
+        
+        future = Future()
+        try:
+            self.queues[model].put_nowait((input_data, alpha_matting, options, future))
+        except queue.Full:
+            with self._lock:
+                self.stats[model]['rejected'] += 1
+            raise
+        return future
+    
+    def _worker(self, model):
+        """Atiende la cola de un modelo agrupando peticiones en lotes."""
+        pending = self.queues[model]
+        session = self.sessions[model]
+        
+        while True:
+            # Esperar la primera petición y completar el lote con las que lleguen
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Las peticiones con las mismas opciones comparten una pasada del modelo
+            groups = {}
+            for input_data, alpha_matting, options, future in batch:
+                if future.set_running_or_notify_cancel():
+                    key = (alpha_matting, tuple(sorted(options.items())))
+                    groups.setdefault(key, []).append((input_data, future))
+            
+            for (alpha_matting, options), requests in groups.items():
+                try:
+                    outputs = remove_background_bytes_batch(
+                        [input_data for input_data, _ in requests],
+                        model=model,
+                        alpha_matting=alpha_matting,
+                        session=session,
+                        cache=self.cache,
+                        batch_size=self.batch_size,
+                        **dict(options)
+                    )
+                except Exception as e:
+                    outputs = [e] * len(requests)
+                for (_, future), output in zip(requests, outputs):
+                    if isinstance(output, Exception):
+                        future.set_exception(output)
+                    else:
+                        future.set_result(output)
+            
+            with self._lock:
+                self.stats[model]['processed'] += len(batch)
+                self.stats[model]['batches'] += 1
+    
+    def status(self):
+        """Devuelve el estado de las colas y los contadores de cada modelo."""
+        with self._lock:
+            return {
+                model: dict(self.stats[model], queued=self.queues[model].qsize())
+                for model in self.models
+            }
+    
+    def cache_status(self):
+        """Devuelve los contadores de la caché o None si no se usa."""
+        if self.cache is None:
+            return None
+        return {'hits': self.cache.hits, 'misses': self.cache.misses}
+
+
+def make_request_handler(service, timeout=60, max_bytes=50 * 1024 * 1024):
+    """
+    Crea el manejador HTTP del modo servidor.
+    
+    Endpoints:
+        POST /remove?model=...&alpha_matting=1|edge&format=png|webp|mask
+             (cuerpo: bytes de la imagen) -> imagen codificada
+        GET  /health                                                          -> JSON con el estado
+    
+    Args:
+        service (BackgroundRemovalService): Servicio con los modelos cargados
+        timeout (float): Segundos máximos de espera por petición
+        max_bytes (int): Tamaño máximo aceptado para la imagen
+    """
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    
+    class RequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def address_string(self):
+            # En sockets Unix client_address no es una tupla (host, puerto)
+            if isinstance(self.client_address, tuple):
+                return self.client_address[0]
+            return 'unix'
+        
+        def _send(self, code, body, content_type='application/json'):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            if urlparse(self.path).path == '/health':
+                self._send(200, {
+                    'status': 'ok',
+                    'models': service.status(),
+                    'cache': service.cache_status()
+                })
+            else:
+                self._send(404, {'error': 'Ruta no encontrada'})
+        
+        def do_POST(self):
+            # Las respuestas que no leen el cuerpo cierran la conexión: con HTTP/1.1
+            # el cuerpo pendiente se interpretaría como la siguiente petición
+            url = urlparse(self.path)
+            if url.path != '/remove':
+                self.close_connection = True
+                self._send(404, {'error': 'Ruta no encontrada'})
+                return
+            
+            length = self.headers.get('Content-Length')
+            if length is None:
+                self.close_connection = True
+                self._send(411, {'error': 'Se requiere Content-Length'})
+                return
+            try:
+                length = int(length)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                self.close_connection = True
+                self._send(400, {'error': 'Content-Length no válido'})
+                return
+            if length > max_bytes:
+                self.close_connection = True
+                self._send(413, {'error': f'La imagen supera {max_bytes} bytes'})
+                return
+            input_data = self.rfile.read(length)
+            
+            params = parse_qs(url.query)
+            model = params.get('model', [service.models[0]])[0]
+            alpha_matting = params.get('alpha_matting', ['0'])[0].lower()
+            alpha_matting = 'edge' if alpha_matting == 'edge' else alpha_matting in ['1', 'true', 'si', 'sí', 'yes']
+            output_format = params.get('format', [service.options.get('output_format', 'png')])[0]
+            if output_format not in OUTPUT_FORMATS:
+                self._send(400, {'error': f"Formato '{output_format}' no soportado",
+                                 'formats': list(OUTPUT_FORMATS)})
+                return
+            
+            try:
+                future = service.submit(input_data, model=model, alpha_matting=alpha_matting,
+                                        output_format=output_format)
+            except KeyError:
+                self._send(400, {'error': f"Modelo '{model}' no cargado", 'models': service.models})
+                return
+            except queue.Full:
+                self._send(503, {'error': 'Servidor ocupado, inténtalo de nuevo'})
+                return
+            
+            try:
+                output_data = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self._send(504, {'error': 'Tiempo de espera agotado'})
+                return
+            except Exception as e:
+                self._send(422, {'error': str(e)})
+                return
+            
+            self._send(200, output_data, content_type=OUTPUT_FORMATS[output_format]['content_type'])
+    
+    return RequestHandler
+
+
+def serve(service, host='127.0.0.1', port=8765, unix_socket=None, timeout=60):
+    """
+    Inicia el servidor HTTP (TCP local o socket Unix) y atiende peticiones hasta Ctrl+C.
+    
+    Args:
+        service (BackgroundRemovalService): Servicio con los modelos cargados
+        host (str): Dirección de escucha en modo TCP
+        port (int): Puerto de escucha en modo TCP
+        unix_socket (str): Ruta de un socket Unix (opcional, sustituye a host/puerto)
+        timeout (float): Segundos máximos de espera por petición
+    """
+    import socketserver
+    from http.server import ThreadingHTTPServer
+    
+    handler = make_request_handler(service, timeout=timeout)
+    
+    if unix_socket is not None:
+        class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+        
+        socket_path = Path(unix_socket)
+        if socket_path.exists():
+            socket_path.unlink()
+        server = ThreadingUnixHTTPServer(str(socket_path), handler)
+        address = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{port}"
+    
+    print(f"\n🚀 Servidor escuchando en {address}")
+    print("   POST /remove?model=<modelo>&alpha_matting=1&format=png  |  GET /health")
+    print("   Pulsa Ctrl+C para detenerlo.\n")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Deteniendo servidor...")
+    finally:
+        server.server_close()
+        if unix_socket is not None and Path(unix_socket).exists():
+            Path(unix_socket).unlink()
+
+
+def main():
+    """Función principal para ejecutar desde línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description='Elimina el fondo de imágenes usando IA',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Modelos disponibles:
+  birefnet-general      - Modelo BiRefNet de alta calidad (por defecto, RECOMENDADO)
+  birefnet-portrait     - BiRefNet optimizado para retratos/personas
+  isnet-general-use     - Modelo IS-Net mejorado
+  u2net                 - Modelo U2Net clásico (más rápido, menor calidad)
+
+Ejemplos de uso:
+  %(prog)s foto.jpg
+  %(prog)s foto.jpg -o resultado.png
+  %(prog)s foto.jpg -m birefnet-portrait  # mejor para personas
+  %(prog)s foto.jpg -a  # con alpha matting para bordes suaves
+  %(prog)s foto_24mpx.jpg -a --matting edge  # alpha matting solo en el borde, por teselas
+  %(prog)s fotogramas/ -d salida/ --sequence  # vídeo exportado a imágenes, una sola sesión
+  %(prog)s "giro_*.png" -d salida/ --sequence --reuse-threshold 2.5  # reutiliza más máscaras
+  %(prog)s foto.jpg -m isnet-general-use -o output/sin_fondo.png
+  %(prog)s fotos/ -d salida/  # todas las imágenes de un directorio
+  %(prog)s "catalogo/*.jpg" otra.png -d salida/  # varios archivos o patrones
+  %(prog)s fotos/ -d salida/ -w 4  # 4 procesos en paralelo
+  %(prog)s fotos/ -d salida/ --batch-size 8  # 8 imágenes por pasada del modelo
+  %(prog)s foto.jpg -f webp  # WebP con transparencia
+  %(prog)s foto.jpg -f mask  # solo la máscara (blanco = primer plano)
+  %(prog)s fotos/ -d salida/ --compress-level 1  # PNG rápido para lotes grandes
+  %(prog)s foto_24mpx.jpg --max-side 2048  # máscara a resolución reducida, salida a tamaño original
+  %(prog)s fotos/ -d salida/ --cache-dir ~/.cache/rembg-resultados  # reutiliza resultados previos
+  %(prog)s --serve --port 8765  # servidor HTTP local con modelos precargados
+  %(prog)s --serve --socket /tmp/rembg.sock -m u2net  # socket Unix, un solo modelo
+  %(prog)s --download-models --model-dir /srv/modelos  # prepara los modelos sin conexión
+  %(prog)s fotos/ -d salida/ --model-dir /srv/modelos  # carga los modelos de solo lectura
+  %(prog)s fotos/ -d salida/ --intra-threads 4 --graph-optimization all  # ajusta ONNX Runtime
+  %(prog)s foto.jpg -m u2net --quantize  # variante int8 del modelo (más rápida en CPU)
+        """
+    )
+    
+    parser.add_argument(
+        'input',
+        nargs='*',
+        help='Imágenes de entrada: archivos, directorios o patrones glob'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Ruta de la imagen de salida (por defecto: [nombre]_no_bg.png)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-d', '--output-dir',
+        help='Directorio de salida para procesar varias imágenes (por defecto: junto a cada imagen)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '-m', '--model',
+        help='Modelo a usar (por defecto: birefnet-general; con --serve: todos)',
+        choices=MODELS,
+        default=None
     )
     
     parser.add_argument(
@@ -200,21 +2105,393 @@ Ejemplos de uso:
         action='store_true'
     )
     
+    parser.add_argument(
+        '--sequence',
+        action='store_true',
+        help='Tratar las entradas como fotogramas de un vídeo, en orden de nombre '
+             '(reutiliza la máscara en fotogramas casi idénticos; requiere -d)'
+    )
+    
+    parser.add_argument(
+        '--reuse-threshold',
+        help='Diferencia media (0-255) por debajo de la cual un fotograma reutiliza la '
+             f'máscara anterior en --sequence (por defecto: {SEQUENCE_REUSE_THRESHOLD}, 0 = nunca)',
+        type=float,
+        default=SEQUENCE_REUSE_THRESHOLD
+    )
+    
+    parser.add_argument(
+        '--max-reuse',
+        help='Fotogramas seguidos que pueden reutilizar una máscara en --sequence '
+             f'(por defecto: {SEQUENCE_MAX_REUSE})',
+        type=int,
+        default=SEQUENCE_MAX_REUSE
+    )
+    
+    parser.add_argument(
+        '--matting',
+        help='Alcance del alpha matting: toda la imagen (full, por defecto) o solo la '
+             'franja del borde por teselas (edge, mucho más rápido en fotos grandes)',
+        choices=['full', 'edge'],
+        default='full'
+    )
+    
+    parser.add_argument(
+        '-f', '--format',
+        help='Formato de salida: png, webp (con transparencia) o mask (solo la máscara en PNG)',
+        choices=list(OUTPUT_FORMATS),
+        default='png'
+    )
+    
+    parser.add_argument(
+        '--compress-level',
+        help='Nivel de compresión PNG de 0 (rápido) a 9 (archivos más pequeños) (por defecto: 6)',
+        type=int,
+        choices=range(10),
+        metavar='0-9',
+        default=6
+    )
+    
+    parser.add_argument(
+        '--quality',
+        help='Calidad WebP de 1 a 100; 100 = sin pérdida (por defecto: 90)',
+        type=int,
+        default=90
+    )
+    
+    parser.add_argument(
+        '--max-side',
+        help='Calcular la máscara sobre una copia con este lado mayor máximo y reescalarla '
+             'al original (recomendado para fotos muy grandes, p. ej. 2048)',
+        type=int,
+        default=None
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        help='Procesos en paralelo para el modo lote (por defecto: 1)',
+        type=int,
+        default=1
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Directorio de caché de resultados (por defecto: sin caché)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--cache-size-mb',
+        help='Tamaño máximo de la caché en MB (por defecto: 1024)',
+        type=int,
+        default=1024
+    )
+    
+    parser.add_argument(
+        '--serve',
+        help='Modo servidor: mantiene los modelos cargados y atiende peticiones HTTP',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--host',
+        help='Dirección de escucha del servidor (por defecto: 127.0.0.1)',
+        default='127.0.0.1'
+    )
+    
+    parser.add_argument(
+        '--port',
+        help='Puerto del servidor (por defecto: 8765)',
+        type=int,
+        default=8765
+    )
+    
+    parser.add_argument(
+        '--socket',
+        help='Ruta de un socket Unix para el servidor (en lugar de host/puerto)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--model-dir',
+        help='Directorio compartido de modelos preparado con --download-models '
+             '(se usa solo para lectura, sin descargas)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--download-models',
+        action='store_true',
+        help='Descargar en --model-dir los modelos de -m (por defecto: todos) y salir'
+    )
+    
+    parser.add_argument(
+        '--verify-models',
+        action='store_true',
+        help='Comprobar el SHA-256 de los modelos de --model-dir y salir'
+    )
+    
+    parser.add_argument(
+        '--intra-threads',
+        help='Hilos de ONNX Runtime dentro de cada operador (por defecto: los de rembg)',
+        type=int,
+        default=None
+    )
+    
+    parser.add_argument(
+        '--inter-threads',
+        help='Hilos de ONNX Runtime entre operadores independientes',
+        type=int,
+        default=None
+    )
+    
+    parser.add_argument(
+        '--graph-optimization',
+        help='Nivel de optimización del grafo de ONNX Runtime (por defecto: all)',
+        choices=list(OPTIMIZATION_LEVELS),
+        default=None
+    )
+    
+    parser.add_argument(
+        '--no-memory-arena',
+        action='store_true',
+        help='Desactivar el arena de memoria de la CPU (menos memoria retenida entre imágenes)'
+    )
+    
+    parser.add_argument(
+        '--quantize',
+        action='store_true',
+        help='Usar una variante int8 del modelo, generada y guardada la primera vez '
+             '(requiere el paquete onnx)'
+    )
+    
+    parser.add_argument(
+        '--quantized-dir',
+        help=f'Directorio de los modelos int8 (por defecto: {QUANTIZED_DIR})',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--queue-size',
+        help='Peticiones en espera admitidas por modelo en el servidor (por defecto: 32)',
+        type=int,
+        default=32
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        help='Imágenes por pasada del modelo: en modo lote (por defecto: 1) y peticiones '
+             f'agrupadas en el servidor (por defecto: {BATCH_SIZE})',
+        type=int,
+        default=None
+    )
+    
     args = parser.parse_args()
     
+    if args.workers < 1:
+        parser.error("-w/--workers debe ser al menos 1")
+    
+    if args.max_side is not None and args.max_side < 64:
+        parser.error("--max-side debe ser al menos 64")
+    
+    if not 1 <= args.quality <= 100:
+        parser.error("--quality debe estar entre 1 y 100")
+    
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size debe ser al menos 1")
+    
+    if args.matting == 'edge':
+        if not args.alpha_matting:
+            parser.error("--matting edge requiere -a/--alpha-matting")
+        args.alpha_matting = 'edge'
+    
+    # Opciones de procesamiento y codificación comunes a todos los modos
+    options = {
+        'max_side': args.max_side,
+        'output_format': args.format,
+        'compress_level': args.compress_level,
+        'quality': args.quality
+    }
+    
+    for name in ('intra_threads', 'inter_threads'):
+        if getattr(args, name) is not None and getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} debe ser al menos 1")
+    
+    # Opciones de ONNX Runtime: solo las indicadas, para conservar los valores de rembg
+    runtime = {}
+    if args.intra_threads:
+        runtime['intra_threads'] = args.intra_threads
+    if args.inter_threads:
+        runtime['inter_threads'] = args.inter_threads
+    if args.graph_optimization:
+        runtime['optimization'] = args.graph_optimization
+    if args.no_memory_arena:
+        runtime['memory_arena'] = False
+    if args.quantize:
+        runtime['quantized'] = True
+        runtime['quantized_dir'] = args.quantized_dir
+    
+    if (args.download_models or args.verify_models) and args.model_dir is None:
+        parser.error("--download-models y --verify-models requieren --model-dir")
+    
+    # Verificar dependencias solo después de validar los argumentos
+    check_and_install_dependencies()
+    
+    if args.download_models:
+        try:
+            print(f"\n📦 Preparando modelos en: {args.model_dir}")
+            print("=" * 60)
+            download_models(args.model_dir, [args.model] if args.model else MODELS)
+            print("=" * 60)
+            print("✅ Modelos listos para usar sin conexión con --model-dir")
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    if args.verify_models:
+        problems = verify_models(args.model_dir, [args.model] if args.model else None)
+        if not problems:
+            print(f"❌ Error: no hay modelos en {args.model_dir}", file=sys.stderr)
+            sys.exit(1)
+        for model, problem in problems.items():
+            print(f"✓ {model}" if problem is None else f"✗ {model}: {problem}")
+        if any(problem is not None for problem in problems.values()):
+            sys.exit(1)
+        return
+    
+    if args.model_dir is not None:
+        # Sin -m el servidor carga todos los modelos; en los demás modos, el de por defecto
+        models = [args.model] if args.model else (MODELS if args.serve else ['birefnet-general'])
+        try:
+            use_model_dir(args.model_dir, models)
+        except FileNotFoundError as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    cache = None
+    if args.cache_dir is not None:
+        cache = ResultCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+    
+    if args.serve:
+        # Sin -m se mantienen cargados todos los modelos disponibles
+        models = [args.model] if args.model else MODELS
+        try:
+            service = BackgroundRemovalService(
+                models,
+                queue_size=args.queue_size,
+                batch_size=args.batch_size or BATCH_SIZE,
+                cache=cache,
+                runtime=runtime,
+                **options
+            )
+            serve(service, host=args.host, port=args.port, unix_socket=args.socket)
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    if not args.input:
+        parser.error("se requiere al menos una imagen de entrada")
+    
+    if args.model is None:
+        args.model = 'birefnet-general'
+    
+    if args.sequence:
+        if args.output_dir is None:
+            parser.error("--sequence requiere -d/--output-dir")
+        if args.workers > 1:
+            parser.error("--sequence procesa los fotogramas en orden y no admite -w/--workers")
+        if args.reuse_threshold < 0 or args.max_reuse < 0:
+            parser.error("--reuse-threshold y --max-reuse no pueden ser negativos")
+        
+        try:
+            print(f"\n🎞️  Eliminando fondo de una secuencia ({len(args.input)} entrada(s))")
+            print("=" * 60)
+            
+            print(f"🔄 Cargando modelo '{args.model}'...")
+            session = create_session(args.model, **runtime)
+            stats = remove_background_sequence(
+                args.input,
+                args.output_dir,
+                model=args.model,
+                alpha_matting=args.alpha_matting,
+                session=session,
+                reuse_threshold=args.reuse_threshold,
+                max_reuse=args.max_reuse,
+                **options
+            )
+            
+            print("=" * 60)
+            print(f"✅ Procesados: {stats['frames']} fotogramas en {stats['seconds']:.2f} s "
+                  f"({stats['fps']:.1f} fps)")
+            print(f"   Máscara calculada: {stats['inferred']}, reutilizada: {stats['reused']}")
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    # Varias entradas, directorios o patrones: modo lote con una sola sesión
+    batch_mode = (
+        len(args.input) > 1
+        or args.output_dir is not None
+        or args.workers > 1
+        or (args.batch_size or 1) > 1
+        or Path(args.input[0]).is_dir()
+        or glob.has_magic(args.input[0])
+    )
+    
+    if batch_mode:
+        if args.output is not None:
+            parser.error("-o/--output solo admite una imagen; usa -d/--output-dir para varias")
+        
+        try:
+            print(f"\n🎨 Eliminando fondo en lote ({len(args.input)} entrada(s))")
+            print("=" * 60)
+            
+            start = time.perf_counter()
+            results = remove_background_batch(
+                args.input,
+                output_dir=args.output_dir,
+                model=args.model,
+                alpha_matting=args.alpha_matting,
+                workers=args.workers,
+                cache=cache,
+                runtime=runtime,
+                batch_size=args.batch_size or 1,
+                **options
+            )
+            print_batch_summary(results, time.perf_counter() - start)
+            
+            if any(r['error'] is not None for r in results):
+                sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
+    args.input = args.input[0]
+    
     try:
         print(f"\n🎨 Eliminando fondo de: {args.input}")
         print("=" * 60)
         
         # Primera ejecución puede tardar en descargar el modelo
-        print("⚠️  Nota: La primera ejecución descargará el modelo de IA (~176MB)")
-        print("   Esto puede tardar unos minutos dependiendo de tu conexión.\n")
+        if args.model_dir is None:
+            print("⚠️  Nota: La primera ejecución descargará el modelo de IA (~176MB)")
+            print("   Esto puede tardar unos minutos dependiendo de tu conexión.\n")
+        
+        # Con opciones de ONNX Runtime la sesión se crea aquí; si no, la crea rembg
+        session = create_session(args.model, **runtime) if runtime else None
         
         output_file = remove_background(
             args.input,
             output_path=args.output,
             model=args.model,
-            alpha_matting=args.alpha_matting
+            alpha_matting=args.alpha_matting,
+            session=session,
+            cache=cache,
+            **options
         )
         
         print("=" * 60)
@@ -225,9 +2502,12 @@ Ejemplos de uso:
         file_size = Path(output_file).stat().st_size / 1024  # KB
         print(f"   Tamaño: {file_size:.1f} KB")
         
+        from PIL import Image
+        
         img = Image.open(output_file)
         print(f"   Dimensiones: {img.width}x{img.height} píxeles")
-        print(f"   Formato: PNG con transparencia")
+        formats = {'png': 'PNG con transparencia', 'webp': 'WebP con transparencia', 'mask': 'PNG (máscara)'}
+        print(f"   Formato: {formats[args.format]}")
         
     except Exception as e:
         print(f"\n❌ Error: {e}", file=sys.stderr)